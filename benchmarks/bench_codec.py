@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the bluestar_ac JSON codec.
+
+Compares the codec against the stdlib path it replaced
+(json.loads(payload.decode()) / json.dumps) on realistic shadow
+documents and /things responses.
+
+    python benchmarks/bench_codec.py [--devices 40] [--number 2000]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import timeit
+
+# Load codec.py on its own so the benchmark does not need Home Assistant
+CODEC_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "custom_components", "bluestar_ac", "codec.py"
+)
+_spec = importlib.util.spec_from_file_location("bluestar_codec", CODEC_PATH)
+codec = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(codec)
+
+
+def shadow_accepted(device_id: str) -> dict:
+    """Return a shadow update/accepted document as pushed by a device."""
+    return {
+        "state": {
+            "reported": {
+                "pow": 1, "mode": 2, "stemp": "75", "ctemp": "81.5", "fspd": 3,
+                "vswing": -1, "hswing": 0, "display": 1, "rssi": -52, "err": 0,
+                "src": "device", "ts": 1700000000000,
+            }
+        },
+        "metadata": {
+            "reported": {
+                key: {"timestamp": 1700000000}
+                for key in ("pow", "mode", "stemp", "ctemp", "fspd", "vswing",
+                            "hswing", "display", "rssi", "err", "src", "ts")
+            }
+        },
+        "version": 48213,
+        "timestamp": 1700000000,
+        "clientToken": device_id,
+    }
+
+
+def things_document(devices: int) -> dict:
+    """Return a /things response for an account with the given device count."""
+    things = []
+    states = {}
+    for index in range(devices):
+        device_id = f"24587ca0{index:04x}"
+        things.append({
+            "thing_id": device_id,
+            "user_config": {"name": f"AC {index}", "room": "Office"},
+            "model": "IC318DBTU", "fw_ver": "2.3.11",
+        })
+        states[device_id] = {
+            "state": shadow_accepted(device_id)["state"]["reported"],
+            "connected": True,
+            "timestamp": 1700000000000,
+        }
+    return {"things": things, "states": states}
+
+
+def main() -> None:
+    """Run the benchmark and print per-operation timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=40)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    shadow = shadow_accepted("24587ca091f8")
+    shadow_bytes = json.dumps(shadow).encode()
+    things = things_document(args.devices)
+    things_bytes = json.dumps(things).encode()
+    command = {"state": {"desired": {"pow": 1, "mode": {"value": 2}, "stemp": "75",
+                                     "ts": 1700000000000, "src": "anmq"}}}
+
+    cases = [
+        ("decode shadow (MQTT bytes)",
+         lambda: json.loads(shadow_bytes.decode()), lambda: codec.loads(shadow_bytes)),
+        (f"decode /things ({args.devices} devices)",
+         lambda: json.loads(things_bytes.decode()), lambda: codec.loads(things_bytes)),
+        ("encode desired command",
+         lambda: json.dumps(command), lambda: codec.dumps(command)),
+    ]
+
+    print(f"codec backend: {codec.BACKEND}")
+    for name, baseline, candidate in cases:
+        base = min(timeit.repeat(baseline, number=args.number, repeat=5)) / args.number
+        fast = min(timeit.repeat(candidate, number=args.number, repeat=5)) / args.number
+        print(f"{name:<34} stdlib {base * 1e6:8.2f} us   codec {fast * 1e6:8.2f} us"
+              f"   x{base / fast:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Load test the integration's API client against the local fake cloud.
+
+Runs BluestarAPI against benchmarks/fake_cloud.py on one machine and
+reports:
+
+  poll cost           get_devices round trips for the whole account
+  command throughput  set_state across every device, over MQTT or HTTP
+  push latency        device report published to push batch delivered
+
+The client keeps its production request scheduler unless --rate is given,
+so command throughput reflects the account-wide rate limit by default.
+
+    python benchmarks/bench_load.py --devices 40 --commands 200 --transport mqtt
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "custom_components"))
+
+from fake_cloud import FakeCloud, add_config_arguments, config_from_args  # noqa: E402
+
+from bluestar_ac.api import BluestarAPI  # noqa: E402
+from bluestar_ac.const import DEFAULT_COMMAND_COALESCE_WINDOW, RATE_LIMIT_RETRIES  # noqa: E402
+from bluestar_ac.scheduler import RequestScheduler  # noqa: E402
+
+FAN_MODES = ("low", "high")
+
+
+def summarize(name: str, samples: List[float], unit: float = 1e3, suffix: str = "ms") -> None:
+    """Print count, mean and percentiles of samples."""
+    if not samples:
+        print(f"{name:<20} no samples")
+        return
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{name:<20} n={len(samples):<5} mean {statistics.fmean(samples) * unit:8.2f} {suffix}"
+          f"   p50 {statistics.median(samples) * unit:8.2f} {suffix}"
+          f"   p95 {p95 * unit:8.2f} {suffix}   max {ordered[-1] * unit:8.2f} {suffix}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Start a fake cloud, drive a client against it and print the results."""
+    cloud = FakeCloud(config_from_args(args))
+    await cloud.start()
+    api = BluestarAPI(
+        "9999999999",
+        "load-test",
+        base_url=cloud.base_url,
+        mqtt_port=cloud.mqtt_port,
+        mqtt_tls=False,
+        coalesce_window=args.coalesce_window,
+        things_cache_ttl=0,
+    )
+    if args.rate:
+        api._scheduler = RequestScheduler(args.rate, max(1, int(args.rate)), RATE_LIMIT_RETRIES)
+
+    push_latency: List[float] = []
+
+    def on_message(deltas: Dict[str, Dict[str, Any]]) -> None:
+        received = time.perf_counter()
+        for delta in deltas.values():
+            published = cloud.reported_at.get(delta.get("state", {}).get("ts"))
+            if published is not None:
+                push_latency.append(received - published)
+
+    try:
+        await api.login()
+        devices = [device.id for device in await api.get_devices()]
+        if args.transport == "mqtt":
+            await api.connect_mqtt(on_message)
+            # Subscriptions go out with the next fetch once MQTT is up
+            await api.get_devices()
+            await asyncio.sleep(0.2)
+
+        poll_cost = []
+        for _ in range(args.polls):
+            started = time.perf_counter()
+            await api.get_devices()
+            poll_cost.append(time.perf_counter() - started)
+
+        command_latency = []
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def command(index: int) -> None:
+            device_id = devices[index % len(devices)]
+            fan_mode = FAN_MODES[(index // len(devices)) % len(FAN_MODES)]
+            async with semaphore:
+                started = time.perf_counter()
+                await api.set_state(device_id, fan_mode=fan_mode)
+                command_latency.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(command(index) for index in range(args.commands)), return_exceptions=True
+        )
+        elapsed = time.perf_counter() - started
+        failed = sum(isinstance(result, Exception) for result in results)
+
+        if args.transport == "mqtt":
+            # Reports spaced out so each is delivered in its own batch
+            for device_id in devices:
+                cloud.report(device_id, {"rssi": -60})
+                await asyncio.sleep(0.005)
+            await asyncio.sleep(max(0.2, args.report_delay * 2))
+
+        print(f"{args.devices} devices, transport {args.transport}, "
+              f"HTTP latency {args.latency * 1e3:.0f} ms, error rate {args.error_rate:.0%}")
+        summarize("poll (get_devices)", poll_cost)
+        summarize("command", command_latency)
+        print(f"{'command throughput':<20} {args.commands - failed} ok, {failed} failed in "
+              f"{elapsed:.2f}s = {(args.commands - failed) / elapsed:.1f} commands/s")
+        summarize("push latency", push_latency)
+        print(f"{'cloud':<20} {cloud.stats}")
+        print(f"{'client scheduler':<20} {api.request_stats}")
+    finally:
+        await api.close()
+        await cloud.stop()
+
+
+def main() -> None:
+    """Parse arguments and run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_config_arguments(parser)
+    parser.add_argument("--transport", choices=("mqtt", "http"), default="mqtt")
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--commands", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--coalesce-window", type=float, default=DEFAULT_COMMAND_COALESCE_WINDOW,
+                        help="seconds the client merges commands per device")
+    parser.add_argument("--rate", type=float,
+                        help="requests/s for the client scheduler instead of the production limit")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
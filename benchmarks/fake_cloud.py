@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Bluestar cloud, for load tests on one machine.
+
+FakeCloud serves the HTTP API the integration uses (/auth/login, /things,
+/things/{id}/preferences) from an aiohttp app, and the AWS IoT shadow
+topics from a minimal in-process MQTT 3.1.1 broker (QoS 0, no TLS). It
+simulates N ACs with configurable HTTP latency, injected 5xx/429 errors,
+a delay before devices report commands, and background state drift.
+
+Point a client at it with BluestarAPI(..., base_url=cloud.base_url,
+mqtt_port=cloud.mqtt_port, mqtt_tls=False); the MQTT endpoint comes from
+the login response as usual. Standalone:
+
+    python benchmarks/fake_cloud.py --devices 40 --latency 0.05 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import random
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from aiohttp import web
+
+_LOGGER = logging.getLogger(__name__)
+
+ACCESS_KEY = "FAKEACCESSKEY"
+SECRET_KEY = "fake-secret-key"
+
+SHADOW_ACCEPTED_TOPIC = "$aws/things/{device_id}/shadow/update/accepted"
+SHADOW_REJECTED_TOPIC = "$aws/things/{device_id}/shadow/update/rejected"
+
+# Reported keys a command can set, and the preferences names they arrive as
+COMMAND_KEYS = ("pow", "mode", "stemp", "fspd", "vswing", "hswing", "display")
+PREFERENCE_KEYS = {
+    "power": "pow",
+    "mode": "mode",
+    "stemp": "stemp",
+    "fspd": "fspd",
+    "vswing": "vswing",
+    "hswing": "hswing",
+    "display": "display",
+}
+
+# MQTT control packet types
+CONNECT = 1
+PUBLISH = 3
+SUBSCRIBE = 8
+UNSUBSCRIBE = 10
+PINGREQ = 12
+DISCONNECT = 14
+
+
+@dataclass
+class FakeCloudConfig:
+    """How the simulated cloud and devices behave."""
+
+    devices: int = 10
+    latency: float = 0.0  # Seconds added to every HTTP response
+    jitter: float = 0.0  # Extra uniform random HTTP latency, seconds
+    error_rate: float = 0.0  # Share of HTTP requests answered with a 503
+    throttle_rate: float = 0.0  # Share of HTTP requests answered with a 429
+    retry_after: float = 1.0  # Retry-After sent with a 429
+    report_delay: float = 0.0  # Seconds before a device reports a command
+    drift_interval: float = 0.0  # Seconds between drift ticks, 0 disables drift
+    drift_fraction: float = 0.1  # Share of devices whose readings drift per tick
+    seed: Optional[int] = None
+
+
+@dataclass
+class SimulatedDevice:
+    """One AC as the cloud sees it."""
+
+    id: str
+    name: str
+    state: Dict[str, Any]
+    connected: bool = True
+    version: int = 1
+
+    def apply(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply commanded values and return the reported keys that changed."""
+        reported = {}
+        for key in COMMAND_KEYS:
+            if key not in changes:
+                continue
+            value = changes[key]
+            if key == "mode" and isinstance(value, dict):
+                value = value.get("value")
+            if key != "stemp":
+                value = int(value)
+            if self.state.get(key) != value:
+                self.state[key] = value
+                reported[key] = value
+        return reported
+
+
+def _encode_length(length: int) -> bytes:
+    """Encode an MQTT remaining length."""
+    encoded = bytearray()
+    while True:
+        digit, length = length % 128, length // 128
+        encoded.append(digit | 0x80 if length else digit)
+        if not length:
+            return bytes(encoded)
+
+
+def _read_string(body: bytes, offset: int) -> tuple:
+    """Read a length-prefixed UTF-8 string; return it and the next offset."""
+    (length,) = struct.unpack_from("!H", body, offset)
+    start = offset + 2
+    return body[start:start + length].decode(), start + length
+
+
+def _topic_matches(topic_filter: str, topic: str) -> bool:
+    """Return True if topic matches an MQTT subscription filter."""
+    filter_parts = topic_filter.split("/")
+    topic_parts = topic.split("/")
+    for index, part in enumerate(filter_parts):
+        if part == "#":
+            return True
+        if index >= len(topic_parts) or part not in ("+", topic_parts[index]):
+            return False
+    return len(filter_parts) == len(topic_parts)
+
+
+class MQTTBroker:
+    """Just enough of an MQTT 3.1.1 broker for the shadow topics.
+
+    Clients authenticate with the fake access key, subscribe with exact
+    topics or wildcards and publish at QoS 0. Publishes from clients are
+    handed to on_publish instead of being fanned out, the way AWS IoT
+    answers shadow updates rather than relaying them.
+    """
+
+    def __init__(self, on_publish):
+        """Initialize the broker."""
+        self._on_publish = on_publish
+        self._clients: Dict[asyncio.StreamWriter, Set[str]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.port = 0
+        self.received = 0
+        self.sent = 0
+
+    async def start(self, host: str, port: int) -> None:
+        """Start listening."""
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Disconnect every client and stop listening."""
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._clients):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    @property
+    def clients(self) -> int:
+        """Return the number of connected clients."""
+        return len(self._clients)
+
+    def publish(self, topic: str, payload: Dict[str, Any]) -> None:
+        """Send a message to every client subscribed to topic."""
+        encoded_topic = topic.encode()
+        body = struct.pack("!H", len(encoded_topic)) + encoded_topic + json.dumps(payload).encode()
+        packet = bytes([PUBLISH << 4]) + _encode_length(len(body)) + body
+        for writer, subscriptions in self._clients.items():
+            if any(_topic_matches(topic_filter, topic) for topic_filter in subscriptions):
+                writer.write(packet)
+                self.sent += 1
+
+    async def _read_packet(self, reader: asyncio.StreamReader) -> tuple:
+        """Read one control packet; return its header byte and body."""
+        header = (await reader.readexactly(1))[0]
+        length = 0
+        multiplier = 1
+        while True:
+            digit = (await reader.readexactly(1))[0]
+            length += (digit & 0x7F) * multiplier
+            multiplier *= 128
+            if not digit & 0x80:
+                break
+        return header, await reader.readexactly(length)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one client connection."""
+        subscriptions: Set[str] = set()
+        try:
+            header, body = await self._read_packet(reader)
+            if header >> 4 != CONNECT:
+                return
+            if not self._authorized(body):
+                # CONNACK: not authorized
+                writer.write(b"\x20\x02\x00\x05")
+                await writer.drain()
+                return
+            writer.write(b"\x20\x02\x00\x00")
+            self._clients[writer] = subscriptions
+
+            while True:
+                header, body = await self._read_packet(reader)
+                packet_type = header >> 4
+                if packet_type == PUBLISH:
+                    self._handle_publish(header, body, writer)
+                elif packet_type == SUBSCRIBE:
+                    self._handle_subscribe(body, subscriptions, writer)
+                elif packet_type == UNSUBSCRIBE:
+                    offset = 2
+                    while offset < len(body):
+                        topic_filter, offset = _read_string(body, offset)
+                        subscriptions.discard(topic_filter)
+                    writer.write(b"\xb0\x02" + body[:2])
+                elif packet_type == PINGREQ:
+                    writer.write(b"\xd0\x00")
+                elif packet_type == DISCONNECT:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+    @staticmethod
+    def _authorized(body: bytes) -> bool:
+        """Check the CONNECT username against the fake access key."""
+        _, offset = _read_string(body, 0)  # Protocol name
+        flags = body[offset + 1]
+        offset += 4  # Level, flags, keep alive
+        _, offset = _read_string(body, offset)  # Client ID
+        if flags & 0x04:
+            # Will topic and message
+            _, offset = _read_string(body, offset)
+            _, offset = _read_string(body, offset)
+        if not flags & 0x80:
+            return False
+        username, _ = _read_string(body, offset)
+        return username == ACCESS_KEY
+
+    def _handle_publish(self, header: int, body: bytes, writer: asyncio.StreamWriter) -> None:
+        """Hand a client publish to the cloud, acking QoS 1."""
+        topic, offset = _read_string(body, 0)
+        if (header >> 1) & 0x03:
+            packet_id = body[offset:offset + 2]
+            offset += 2
+            writer.write(b"\x40\x02" + packet_id)
+        self.received += 1
+        try:
+            payload = json.loads(body[offset:])
+        except ValueError:
+            _LOGGER.debug("Ignoring non-JSON publish on %s", topic)
+            return
+        self._on_publish(topic, payload)
+
+    @staticmethod
+    def _handle_subscribe(body: bytes, subscriptions: Set[str], writer: asyncio.StreamWriter) -> None:
+        """Record subscriptions and grant them at QoS 0."""
+        offset = 2
+        granted = bytearray()
+        while offset < len(body):
+            topic_filter, offset = _read_string(body, offset)
+            offset += 1  # Requested QoS
+            subscriptions.add(topic_filter)
+            granted.append(0)
+        writer.write(bytes([0x90]) + _encode_length(2 + len(granted)) + body[:2] + bytes(granted))
+
+
+class FakeCloud:
+    """The HTTP API and MQTT shadow service of a simulated account."""
+
+    def __init__(self, config: Optional[FakeCloudConfig] = None):
+        """Initialize the cloud and its devices."""
+        self.config = config or FakeCloudConfig()
+        self._random = random.Random(self.config.seed)
+        self.devices: Dict[str, SimulatedDevice] = {}
+        for index in range(self.config.devices):
+            device_id = f"24587ca0{index:04x}"
+            self.devices[device_id] = SimulatedDevice(
+                device_id,
+                f"AC {index}",
+                {
+                    "pow": 1, "mode": 2, "stemp": "75", "ctemp": f"{78 + index % 7}.5",
+                    "fspd": 3, "vswing": 0, "hswing": 0, "display": 1,
+                    "rssi": -45 - index % 30, "err": 0, "src": "device", "ts": 0,
+                },
+            )
+        self.broker = MQTTBroker(self._handle_mqtt_publish)
+        self.host = "127.0.0.1"
+        self.base_url = ""
+        self.sessions: Set[str] = set()
+        self.stats: Dict[str, int] = {
+            "logins": 0, "things": 0, "preferences": 0, "mqtt_commands": 0,
+            "errors_injected": 0, "throttled": 0, "reports": 0,
+        }
+        # perf_counter time each reported ts was published, for push latency
+        self.reported_at: Dict[int, float] = {}
+        self._report_ts = int(time.time() * 1000)
+        self._runner: Optional[web.AppRunner] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def mqtt_port(self) -> int:
+        """Return the port the MQTT broker listens on."""
+        return self.broker.port
+
+    async def start(self, host: str = "127.0.0.1", http_port: int = 0, mqtt_port: int = 0) -> None:
+        """Start the HTTP API, the MQTT broker and, if configured, drift."""
+        self.host = host
+        app = web.Application(middlewares=[self._faults])
+        app.router.add_post("/auth/login", self._login)
+        app.router.add_get("/things", self._things)
+        app.router.add_post("/things/{device_id}/preferences", self._preferences)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, http_port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+
+        await self.broker.start(host, mqtt_port)
+        if self.config.drift_interval > 0:
+            self._tasks.append(asyncio.get_running_loop().create_task(self._drift()))
+
+    async def stop(self) -> None:
+        """Stop everything started by start()."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await self.broker.stop()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeCloud":
+        """Start on local ephemeral ports."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Stop the cloud."""
+        await self.stop()
+
+    def report(self, device_id: str, changes: Optional[Dict[str, Any]] = None) -> int:
+        """Publish a device's reported state, all of it when changes is None.
+
+        Returns the ts stamped on the report; reported_at maps it to the
+        time it was published.
+        """
+        device = self.devices[device_id]
+        self._report_ts += 1
+        device.state["ts"] = self._report_ts
+        device.version += 1
+        reported = dict(device.state) if changes is None else {**changes, "ts": self._report_ts}
+        self.reported_at[self._report_ts] = time.perf_counter()
+        self.stats["reports"] += 1
+        self.broker.publish(
+            SHADOW_ACCEPTED_TOPIC.format(device_id=device_id),
+            {"state": {"reported": reported}, "version": device.version,
+             "timestamp": int(time.time())},
+        )
+        return self._report_ts
+
+    # HTTP API
+
+    @web.middleware
+    async def _faults(self, request: web.Request, handler) -> web.StreamResponse:
+        """Add latency and inject errors in front of every handler."""
+        config = self.config
+        delay = config.latency + self._random.uniform(0, config.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        roll = self._random.random()
+        if roll < config.error_rate:
+            self.stats["errors_injected"] += 1
+            return web.json_response({"message": "Internal server error"}, status=503)
+        if roll < config.error_rate + config.throttle_rate:
+            self.stats["throttled"] += 1
+            return web.json_response(
+                {"message": "Too Many Requests"},
+                status=429,
+                headers={"Retry-After": str(config.retry_after)},
+            )
+        return await handler(request)
+
+    def _authorized(self, request: web.Request) -> bool:
+        """Return True if the request carries a live session."""
+        return request.headers.get("X-APP-SESSION") in self.sessions
+
+    async def _login(self, request: web.Request) -> web.Response:
+        """Issue a session and MQTT credentials pointing at the local broker."""
+        body = await request.json()
+        if not body.get("auth_id") or not body.get("password"):
+            return web.json_response({"message": "Invalid credentials"}, status=400)
+        self.stats["logins"] += 1
+        session = f"session-{self.stats['logins']}"
+        self.sessions.add(session)
+        credentials = f"{self.host}::{ACCESS_KEY}::{SECRET_KEY}".encode()
+        return web.json_response({
+            "session": session,
+            "mi": base64.b64encode(credentials).decode(),
+            "user": {"name": "Load Test"},
+        })
+
+    async def _things(self, request: web.Request) -> web.Response:
+        """Return every device and its reported state."""
+        if not self._authorized(request):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        self.stats["things"] += 1
+        return web.json_response({
+            "things": [
+                {"thing_id": device.id, "user_config": {"name": device.name}, "model": "IC318DBTU"}
+                for device in self.devices.values()
+            ],
+            "states": {
+                device.id: {"state": device.state, "connected": device.connected}
+                for device in self.devices.values()
+            },
+        })
+
+    async def _preferences(self, request: web.Request) -> web.Response:
+        """Apply a preferences update and have the device report it."""
+        if not self._authorized(request):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        device = self.devices.get(request.match_info["device_id"])
+        if device is None:
+            return web.json_response({"message": "Thing not found"}, status=404)
+        self.stats["preferences"] += 1
+        body = await request.json()
+        for mode_config in body.get("preferences", {}).get("mode", {}).values():
+            changes = {
+                PREFERENCE_KEYS[key]: value
+                for key, value in mode_config.items()
+                if key in PREFERENCE_KEYS
+            }
+            self._command(device, changes)
+        return web.json_response({"status": "ok"})
+
+    # MQTT shadow service
+
+    def _handle_mqtt_publish(self, topic: str, payload: Dict[str, Any]) -> None:
+        """Answer shadow updates and force-sync requests."""
+        parts = topic.split("/")
+        if topic.startswith("$aws/things/") and topic.endswith("/shadow/update"):
+            self._shadow_update(parts[2], payload)
+        elif len(parts) == 3 and parts[0] == "things" and parts[2] == "control":
+            if parts[1] in self.devices:
+                self.report(parts[1])
+
+    def _shadow_update(self, device_id: str, payload: Dict[str, Any]) -> None:
+        """Accept or reject a desired-state update like the AWS IoT shadow."""
+        client_token = payload.get("clientToken")
+        device = self.devices.get(device_id)
+        desired = payload.get("state", {}).get("desired")
+        if device is None or not isinstance(desired, dict):
+            self.broker.publish(
+                SHADOW_REJECTED_TOPIC.format(device_id=device_id),
+                {"code": 404 if device is None else 400, "message": "Rejected",
+                 "clientToken": client_token},
+            )
+            return
+        self.stats["mqtt_commands"] += 1
+        device.version += 1
+        self.broker.publish(
+            SHADOW_ACCEPTED_TOPIC.format(device_id=device_id),
+            {"state": {"desired": desired}, "version": device.version,
+             "timestamp": int(time.time()), "clientToken": client_token},
+        )
+        if desired.get("fpsh"):
+            self.report(device_id)
+        else:
+            self._command(device, desired)
+
+    def _command(self, device: SimulatedDevice, changes: Dict[str, Any]) -> None:
+        """Have a device apply a command and report it after report_delay."""
+        reported = device.apply(changes)
+        if not reported:
+            return
+        if self.config.report_delay > 0:
+            asyncio.get_running_loop().call_later(
+                self.config.report_delay, self.report, device.id, reported
+            )
+        else:
+            self.report(device.id, reported)
+
+    async def _drift(self) -> None:
+        """Nudge room temperature and signal strength of some devices."""
+        config = self.config
+        while True:
+            await asyncio.sleep(config.drift_interval)
+            count = max(1, round(len(self.devices) * config.drift_fraction))
+            for device in self._random.sample(list(self.devices.values()), min(count, len(self.devices))):
+                ctemp = float(device.state["ctemp"]) + self._random.choice((-0.5, 0.5))
+                rssi = min(-30, max(-90, device.state["rssi"] + self._random.randint(-3, 3)))
+                device.state["ctemp"] = f"{ctemp:.1f}"
+                device.state["rssi"] = rssi
+                self.report(device.id, {"ctemp": device.state["ctemp"], "rssi": rssi})
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    """Run a fake cloud until interrupted."""
+    cloud = FakeCloud(config_from_args(args))
+    await cloud.start(args.host, args.http_port, args.mqtt_port)
+    print(f"HTTP {cloud.base_url}  MQTT {cloud.host}:{cloud.mqtt_port} (no TLS)  "
+          f"{len(cloud.devices)} devices")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await cloud.stop()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the FakeCloudConfig options to a command line parser."""
+    parser.add_argument("--devices", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="HTTP latency, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random HTTP latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of 429 responses")
+    parser.add_argument("--report-delay", type=float, default=0.0,
+                        help="seconds before a device reports a command")
+    parser.add_argument("--drift-interval", type=float, default=0.0,
+                        help="seconds between drift ticks, 0 disables drift")
+    parser.add_argument("--drift-fraction", type=float, default=0.1,
+                        help="share of devices drifting per tick")
+    parser.add_argument("--seed", type=int)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeCloudConfig:
+    """Build a FakeCloudConfig from the options of add_config_arguments."""
+    return FakeCloudConfig(
+        devices=args.devices,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        report_delay=args.report_delay,
+        drift_interval=args.drift_interval,
+        drift_fraction=args.drift_fraction,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    """Serve a fake cloud from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_config_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--http-port", type=int, default=8080)
+    parser.add_argument("--mqtt-port", type=int, default=1883)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
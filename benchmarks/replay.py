@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Replay a traffic recording through the coordinator and entities.
+
+Reads a recording made with the bluestar_ac.start_recording service and
+feeds it into a real BluestarCoordinator with every platform's entities
+attached, offline:
+
+  GET /things   answered with the recorded response, then one refresh
+  mqtt_in       delivered through the client's MQTT message handler
+  everything else (login, commands, mqtt_out) is counted, not replayed
+
+Events are replayed at their recorded offsets divided by --speed, or as
+fast as possible with --speed 0, and the run reports coordinator updates,
+entity state writes and the time spent handling events. A recording taken
+with several config entries loaded is replayed one entry at a time; pick
+it with --entry.
+
+    python benchmarks/replay.py bluestar_ac_20240101_120000.jsonl --speed 10
+"""
+
+import argparse
+import asyncio
+import collections
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "custom_components"))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from bluestar_ac import climate, codec, select, sensor, switch  # noqa: E402
+from bluestar_ac.api import BluestarAPI  # noqa: E402
+from bluestar_ac.const import DOMAIN, MQTT_PUSH_QUEUE_SIZE  # noqa: E402
+from bluestar_ac.coordinator import BluestarCoordinator  # noqa: E402
+from bluestar_ac.mqtt import PushBridge  # noqa: E402
+from bluestar_ac.recorder import EVENT_HTTP, EVENT_MQTT_IN, read_recording  # noqa: E402
+from bluestar_ac.scheduler import RequestScheduler  # noqa: E402
+
+PLATFORMS = (climate, switch, sensor, select)
+ENTRY_ID = "replay"
+
+
+def replay_api() -> BluestarAPI:
+    """Return a client whose /things answers are set by the replay."""
+    api = BluestarAPI("replay", "replay", coalesce_window=0, things_cache_ttl=0)
+    api.session_token = "replay"
+    api._scheduler = RequestScheduler(1e9, 10**9, 0)
+    api.replay_response = None
+
+    async def get_things() -> Any:
+        status, body = api.replay_response
+        if status >= 400:
+            raise Exception(f"Failed to fetch devices: {status}")
+        return body
+
+    async def post_preferences(device_id, preferences_payload, headers) -> None:
+        pass
+
+    api._get_things = get_things
+    api._post_preferences = post_preferences
+    return api
+
+
+async def add_entities(hass, coordinator, api, writes: collections.Counter) -> int:
+    """Set up every platform's entities and count their state writes."""
+    hass.data.setdefault(DOMAIN, {})[ENTRY_ID] = {"api": api, "coordinator": coordinator}
+    entities: List[Any] = []
+    for platform in PLATFORMS:
+        await platform.async_setup_entry(hass, SimpleNamespace(entry_id=ENTRY_ID), entities.extend)
+
+    for entity in entities:
+        entity.hass = hass
+        entity.entity_id = f"{DOMAIN}.{entity.device_id}_{type(entity).__name__}"
+
+        def write_state(entity=entity) -> None:
+            # What a real write reads, without a state machine behind it
+            entity.state
+            entity.available
+            writes[type(entity).__name__] += 1
+
+        entity.async_write_ha_state = write_state
+        coordinator.async_add_listener(entity._handle_coordinator_update)
+    return len(entities)
+
+
+def select_entry(events: List[Any], entry: Optional[str]) -> List[Any]:
+    """Return the events of one config entry, exiting if that is ambiguous."""
+    entries = sorted({event["entry"] for event in events if "entry" in event})
+    if entry is None:
+        if len(entries) > 1:
+            sys.exit(f"recording has several config entries, pass --entry with one of: "
+                     f"{', '.join(entries)}")
+        return events
+    if entry not in entries:
+        sys.exit(f"no events for entry {entry}, recorded entries: {', '.join(entries)}")
+    return [event for event in events if event.get("entry", entry) == entry]
+
+
+async def replay(args: argparse.Namespace) -> None:
+    """Replay the recording and print what it caused."""
+    events = select_entry(
+        [event for event in read_recording(args.recording) if "t" in event], args.entry
+    )
+    api = replay_api()
+    counts: collections.Counter = collections.Counter()
+    writes: collections.Counter = collections.Counter()
+    handling: List[float] = []
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        coordinator = BluestarCoordinator(hass, api)
+        updates = 0
+
+        def count_update() -> None:
+            nonlocal updates
+            updates += 1
+
+        api._push_bridge = PushBridge(
+            asyncio.get_running_loop(), coordinator.async_handle_push, MQTT_PUSH_QUEUE_SIZE
+        )
+        try:
+            entities = 0
+            started = time.perf_counter()
+            for event in events:
+                kind = event["type"]
+                if kind == EVENT_HTTP:
+                    kind = f"{event['method']} {event['path']}"
+                counts[kind] += 1
+                if args.speed:
+                    delay = started + event["t"] / args.speed - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                handled = time.perf_counter()
+                if kind == "GET /things":
+                    api.replay_response = (event["status"], event.get("response"))
+                    await coordinator.async_refresh()
+                    if not entities and coordinator.data:
+                        # Entities exist from the first snapshot on, as in setup
+                        entities = await add_entities(hass, coordinator, api, writes)
+                        coordinator.async_add_listener(count_update)
+                elif kind == EVENT_MQTT_IN:
+                    message = SimpleNamespace(
+                        topic=event["topic"], payload=codec.dumps(event["payload"])
+                    )
+                    api._on_mqtt_message(None, None, message)
+                    # The bridge delivers on the next loop iteration
+                    await asyncio.sleep(0)
+                else:
+                    continue
+                handling.append(time.perf_counter() - handled)
+            elapsed = time.perf_counter() - started
+        finally:
+            await api.close()
+            await hass.async_stop(force=True)
+
+    recorded = events[-1]["t"] if events else 0
+    print(f"{args.recording}: {len(events)} events over {recorded:.1f}s, "
+          f"replayed in {elapsed:.2f}s at speed {args.speed or 'max'}")
+    for kind, count in sorted(counts.items()):
+        print(f"  {kind:<36} {count}")
+    print(f"devices {len(coordinator.data or {})}, entities {entities}, "
+          f"coordinator updates {updates}, entity writes {sum(writes.values())}")
+    for name, count in sorted(writes.items()):
+        print(f"  {name:<36} {count}")
+    if handling:
+        print(f"handling {len(handling)} events: mean {statistics.fmean(handling) * 1e3:.3f} ms, "
+              f"max {max(handling) * 1e3:.3f} ms, total {sum(handling) * 1e3:.1f} ms")
+    print(f"push {api.push_stats}")
+
+
+def main() -> None:
+    """Parse arguments and replay the recording."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", help="JSON Lines file from bluestar_ac.start_recording")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="playback speed multiplier, 0 for as fast as possible")
+    parser.add_argument("--entry", help="config entry ID to replay, when several were recording")
+    asyncio.run(replay(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
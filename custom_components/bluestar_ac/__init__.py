@@ -1,17 +1,24 @@
 """Bluestar Smart AC integration."""
 
 import asyncio
+import contextlib
 import logging
+import time
 import traceback
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry, ConfigEntryNotReady
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
+from homeassistant.util.ssl import get_default_context
 
 from .api import BluestarAPI
-from .const import DOMAIN
+from .const import DEFAULT_POLL_SECONDS, DOMAIN, STORAGE_VERSION
 from .coordinator import BluestarCoordinator
+from .services import async_setup_services, recorder_for_entry
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,9 +30,19 @@ PLATFORMS = [
 ]
 
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    """Set up the Bluestar Smart AC services."""
+    await async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Bluestar Smart AC from a config entry."""
     _LOGGER.debug("B1: Starting setup for entry %s", entry.entry_id)
+    started = time.monotonic()
     
     hass.data.setdefault(DOMAIN, {})
     
@@ -33,35 +50,59 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.debug("B2: Creating API client")
         api = BluestarAPI(
             phone=entry.data["phone"],
-            password=entry.data["password"]
+            password=entry.data["password"],
+            session=async_get_clientsession(hass),
         )
-        
-        _LOGGER.debug("B3: Logging in")
-        await api.login()
+        # Join a recording started before this entry loaded
+        api.recorder = recorder_for_entry(hass, entry.entry_id)
         
         _LOGGER.debug("B4: Creating coordinator")
-        coordinator = BluestarCoordinator(hass, api)
+        coordinator = BluestarCoordinator(hass, api, _snapshot_store(hass, entry))
         
-        _LOGGER.debug("B5: Performing first refresh")
-        await coordinator.async_config_entry_first_refresh()
+        if await coordinator.async_load_snapshot():
+            # Entities come up from the stored snapshot right away, login,
+            # refresh and MQTT catch up in the background
+            _LOGGER.debug("B14: Using stored snapshot, revalidating in the background")
+            mqtt_task = entry.async_create_background_task(
+                hass,
+                _async_revalidate(api, coordinator),
+                f"{DOMAIN}_revalidate_{entry.entry_id}",
+            )
+        else:
+            _LOGGER.debug("B3: Logging in")
+            await api.login()
+            
+            # MQTT only needs the login, so it connects while the first
+            # snapshot is fetched and attaches whenever it is ready
+            _LOGGER.debug("B7: Setting up MQTT in the background")
+            mqtt_task = entry.async_create_background_task(
+                hass,
+                _async_connect_mqtt(api, coordinator),
+                f"{DOMAIN}_mqtt_{entry.entry_id}",
+            )
+            
+            _LOGGER.debug("B5: Performing first refresh")
+            try:
+                await coordinator.async_config_entry_first_refresh()
+            except Exception:
+                mqtt_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await mqtt_task
+                await api.close()
+                raise
         
         _LOGGER.debug("B6: Storing in hass.data")
         hass.data[DOMAIN][entry.entry_id] = {
             "api": api,
             "coordinator": coordinator,
+            "mqtt_task": mqtt_task,
         }
         
-        _LOGGER.debug("B7: Setting up MQTT")
-        try:
-            await api.connect_mqtt(coordinator._async_update_data)
-            _LOGGER.debug("B8: MQTT connected successfully")
-        except Exception as e:
-            _LOGGER.warning("B9: MQTT connection failed, continuing with HTTP only: %s", e)
-        
         _LOGGER.debug("B10: Forwarding platform setups")
         await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
         
-        _LOGGER.debug("B11: Setup completed successfully")
+        _LOGGER.info("B11: Setup of %s completed in %.2fs with %d devices",
+                     entry.title, time.monotonic() - started, len(coordinator.data or {}))
         return True
         
     except asyncio.TimeoutError as e:
@@ -72,6 +113,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         raise
 
 
+def _snapshot_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    """Return the storage holding an entry's last device snapshot."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+
+
+async def _async_revalidate(api: BluestarAPI, coordinator: BluestarCoordinator) -> None:
+    """Log in and refresh a coordinator that started from its snapshot."""
+    while True:
+        try:
+            await api.login()
+            break
+        except Exception as e:  # pylint: disable=broad-except
+            _LOGGER.warning("B15: Login failed, keeping snapshot and retrying in %ss: %s",
+                            DEFAULT_POLL_SECONDS, e)
+            await asyncio.sleep(DEFAULT_POLL_SECONDS)
+
+    await asyncio.gather(
+        coordinator.async_refresh(),
+        _async_connect_mqtt(api, coordinator),
+    )
+
+
+async def _async_connect_mqtt(api: BluestarAPI, coordinator: BluestarCoordinator) -> None:
+    """Connect MQTT off the setup path; HTTP polling covers until it is up."""
+    started = time.monotonic()
+    try:
+        await api.connect_mqtt(
+            coordinator.async_handle_push,
+            coordinator.async_set_push_available,
+            ssl_context=get_default_context(),
+        )
+        _LOGGER.debug("B8: MQTT connected in %.2fs", time.monotonic() - started)
+    except Exception as e:  # pylint: disable=broad-except
+        _LOGGER.warning("B9: MQTT connection failed, continuing with HTTP only: %s", e)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.debug("Unloading entry %s", entry.entry_id)
@@ -79,8 +156,17 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
     if unload_ok:
-        api = hass.data[DOMAIN][entry.entry_id]["api"]
-        await api.close()
+        data = hass.data[DOMAIN][entry.entry_id]
+        # Stop a still-running MQTT connect before tearing the client down
+        data["mqtt_task"].cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await data["mqtt_task"]
+        await data["api"].close()
         hass.data[DOMAIN].pop(entry.entry_id)
     
-    return unload_ok
\ No newline at end of file
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored snapshot of a deleted entry."""
+    await _snapshot_store(hass, entry).async_remove()
@@ -2,33 +2,144 @@
 
 import asyncio
 import base64
-import json
 import logging
+import random
 import ssl
+import time
 import traceback
 from typing import Any, Callable, Dict, List, Optional
 
 import aiohttp
 import paho.mqtt.client as mqtt
 
+from . import codec
+from .cache import DeviceStateCache, SingleFlightCache
+from .coalescer import CommandCoalescer
 from .const import (
     BLUESTAR_BASE_URL,
+    DEFAULT_COMMAND_COALESCE_WINDOW,
     DEFAULT_HEADERS,
     DEFAULT_MQTT_TIMEOUT,
+    DEFAULT_STATE_CACHE_MAX_AGE,
+    DEFAULT_THINGS_CACHE_TTL,
     DEFAULT_TIMEOUT,
     FORCE_FETCH_KEY,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_LIMIT_PER_HOST,
+    MQTT_CONNECT_TIMEOUT,
     MQTT_CONTROL_TOPIC,
     MQTT_KEEPALIVE,
+    MQTT_PORT,
+    MQTT_PUSH_QUEUE_SIZE,
     MQTT_QOS,
+    MQTT_RECONNECT_MAX_PERIOD,
     MQTT_RECONNECT_PERIOD,
     MQTT_STATE_UPDATE_TOPIC,
+    MQTT_UPDATE_ACCEPTED_TOPIC,
+    MQTT_UPDATE_REJECTED_TOPIC,
+    BREAKER_RESET_SECONDS,
+    BREAKER_THRESHOLD,
+    RATE_LIMIT_DEFAULT_DELAY,
+    RATE_LIMIT_RETRIES,
+    REQUEST_BURST,
+    REQUEST_RATE,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    SESSION_REFRESH_MARGIN,
+    SESSION_REFRESH_RETRY,
+    SESSION_TOKEN_TTL,
     SOURCE_KEY,
     SOURCE_VALUE,
+    TRANSPORT_HTTP,
+    TRANSPORT_MQTT,
 )
+from .models import DeviceRecord
+from .mqtt import AsyncioMQTTLoop, PushBridge
+from .recorder import EVENT_MQTT_IN, EVENT_MQTT_OUT, EntryRecorder, decode_body
+from .resilience import BluestarServerError, CircuitBreaker
+from .scheduler import (
+    PRIORITY_COMMAND,
+    PRIORITY_CONFIRM,
+    PRIORITY_POLL,
+    BluestarRateLimitError,
+    RequestScheduler,
+    parse_retry_after,
+)
+from .session import BluestarAuthError, SessionManager
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _device_id_from_topic(topic: str) -> Optional[str]:
+    """Extract the device ID from a things/... or $aws/things/... topic."""
+    parts = topic.split("/")
+    if parts and parts[0] == "$aws":
+        parts = parts[1:]
+    if len(parts) >= 2 and parts[0] == "things":
+        return parts[1]
+    return None
+
+
+def parse_shadow_delta(payload: Any) -> Optional[Dict[str, Any]]:
+    """Turn a pushed shadow document into a device state delta.
+
+    Handles shadow update responses ({"state": {"reported": {...}}}), shadow
+    documents ({"current": {"state": {"reported": {...}}}}) and the plain
+    device state format ({"state": {...}, "connected": true}). Returns a dict
+    with "state" and/or "connected" keys, or None if nothing was reported.
+    """
+    if not isinstance(payload, dict):
+        return None
+    if isinstance(payload.get("current"), dict):
+        payload = payload["current"]
+
+    delta: Dict[str, Any] = {}
+    state = payload.get("state")
+    if isinstance(state, dict):
+        if isinstance(state.get("reported"), dict):
+            delta["state"] = state["reported"]
+        elif "desired" not in state and "delta" not in state:
+            delta["state"] = state
+    if isinstance(payload.get("connected"), bool):
+        delta["connected"] = payload["connected"]
+    return delta or None
+
+
+def _desired_ts(payload: Any) -> Optional[int]:
+    """Extract the command ts echoed back in a shadow accepted/rejected document.
+
+    Accepted documents echo the desired state; rejected ones only echo the
+    clientToken, which is set to the same ts when publishing.
+    """
+    if not isinstance(payload, dict):
+        return None
+    state = payload.get("state")
+    desired = state.get("desired") if isinstance(state, dict) else None
+    ts = desired.get("ts") if isinstance(desired, dict) else None
+    if ts is None:
+        ts = payload.get("clientToken")
+    try:
+        return int(ts) if ts is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _raise_for_rate_limit(response: aiohttp.ClientResponse) -> None:
+    """Raise BluestarRateLimitError if the cloud throttled a request."""
+    if response.status == 429:
+        raise BluestarRateLimitError(
+            "Rate limited by the Bluestar cloud",
+            parse_retry_after(response.headers.get("Retry-After"), RATE_LIMIT_DEFAULT_DELAY),
+        )
+
+
+def _error_type(response: aiohttp.ClientResponse) -> type:
+    """Return the exception type for a failed response; 5xx is retryable."""
+    return BluestarServerError if response.status >= 500 else Exception
+
+
 class BluestarAPI:
     """Bluestar Smart AC API client."""
 
@@ -38,25 +149,78 @@ class BluestarAPI:
         password: str,
         base_url: str = BLUESTAR_BASE_URL,
         mqtt_endpoint: Optional[str] = None,
+        mqtt_port: int = MQTT_PORT,
+        mqtt_tls: bool = True,
+        state_cache_max_age: float = DEFAULT_STATE_CACHE_MAX_AGE,
+        coalesce_window: float = DEFAULT_COMMAND_COALESCE_WINDOW,
+        things_cache_ttl: float = DEFAULT_THINGS_CACHE_TTL,
+        session: Optional[aiohttp.ClientSession] = None,
     ):
-        """Initialize the API client."""
+        """Initialize the API client.
+
+        Pass Home Assistant's shared client session as session; without one
+        the client owns a private session with a tuned keep-alive connector.
+        base_url, mqtt_endpoint, mqtt_port and mqtt_tls point the client at
+        another cloud, such as a local stand-in for load tests.
+        """
         self.phone = phone
         self.password = password
         self.base_url = base_url
         self.mqtt_endpoint = mqtt_endpoint
+        self.mqtt_port = mqtt_port
+        self.mqtt_tls = mqtt_tls
+        self.devices: Dict[str, DeviceRecord] = {}
+        self.state_cache = DeviceStateCache(state_cache_max_age, self.devices)
+        # Opt-in capture of all cloud traffic, see start_recording
+        self.recorder: Optional[EntryRecorder] = None
+        self._things_cache = SingleFlightCache(things_cache_ttl)
+        self._coalescer = CommandCoalescer(coalesce_window, self._send_state)
+        self._scheduler = RequestScheduler(REQUEST_RATE, REQUEST_BURST, RATE_LIMIT_RETRIES)
+        self._breaker = CircuitBreaker(
+            RETRY_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+            BREAKER_THRESHOLD, BREAKER_RESET_SECONDS,
+        )
+        self._auth = SessionManager(
+            self._login, SESSION_TOKEN_TTL, SESSION_REFRESH_MARGIN, SESSION_REFRESH_RETRY
+        )
         self.session_token: Optional[str] = None
         self.mqtt_client: Optional[mqtt.Client] = None
         self.mqtt_credentials: Optional[Dict[str, str]] = None
-        self._session: Optional[aiohttp.ClientSession] = None
+        self._session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
         self._mqtt_connected = False
-        self._mqtt_message_callback: Optional[Callable] = None
+        self._push_bridge: Optional[PushBridge] = None
+        self._mqtt_connection_callback: Optional[Callable] = None
+        self._mqtt_subscribed: set = set()
+        self._pending_acks: Dict[tuple, asyncio.Future] = {}
+        self._mqtt_loop: Optional[AsyncioMQTTLoop] = None
+        self._mqtt_connack: Optional[asyncio.Future] = None
+        self._mqtt_lost = asyncio.Event()
+        self._mqtt_supervisor: Optional[asyncio.Task] = None
+        self._mqtt_refresh_credentials = False
+        self._mqtt_closing = False
 
     async def login(self) -> None:
+        """Login, sharing one attempt between concurrent callers."""
+        await self._auth.login()
+
+    @staticmethod
+    def _create_session() -> aiohttp.ClientSession:
+        """Create a private session tuned for the API Gateway host."""
+        connector = aiohttp.TCPConnector(
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            enable_cleanup_closed=True,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    async def _login(self) -> None:
         """Login and extract credentials."""
         _LOGGER.debug("API1: Starting login process")
         
         if not self._session:
-            self._session = aiohttp.ClientSession()
+            self._session = self._create_session()
 
         try:
             # Prepare login payload
@@ -69,116 +233,266 @@ class BluestarAPI:
             headers = DEFAULT_HEADERS.copy()
             _LOGGER.debug("API2: Sending login request to %s/auth/login", self.base_url)
 
-            async with self._session.post(
-                f"{self.base_url}/auth/login",
-                json=login_payload,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
-            ) as response:
-                if not response.ok:
-                    error_text = await response.text()
-                    _LOGGER.error("API3: Login failed with status %s: %s", response.status, error_text)
-                    raise Exception(f"Login failed: {response.status}")
-
-                login_data = await response.json()
-                _LOGGER.debug("API4: Login successful, extracting credentials")
-
-                # Extract session token
-                self.session_token = login_data.get("session")
-                if not self.session_token:
-                    raise Exception("No session token in login response")
-
-                # Extract AWS credentials from 'mi' field
-                mi_field = login_data.get("mi")
-                if not mi_field:
-                    raise Exception("No 'mi' field in login response")
-
-                # Decode Base64 credentials
-                try:
-                    decoded = base64.b64decode(mi_field).decode("utf-8")
-                    parts = decoded.split("::")
-                    if len(parts) != 3:
-                        raise Exception(f"Invalid credential format. Expected 3 parts, got {len(parts)}")
-                    
-                    endpoint, access_key, secret_key = parts
-                    self.mqtt_credentials = {
-                        "endpoint": endpoint,
-                        "access_key": access_key,
-                        "secret_key": secret_key,
-                        "session_id": self.session_token,
-                    }
-                    
-                    # Update MQTT endpoint if not provided
-                    if not self.mqtt_endpoint:
-                        self.mqtt_endpoint = endpoint
-                        
-                    _LOGGER.debug("API5: Credentials extracted successfully")
-                    _LOGGER.debug("API6: MQTT endpoint: %s", endpoint)
+            login_data = await self._breaker.call(
+                lambda: self._scheduler.run(
+                    PRIORITY_COMMAND, lambda: self._request_login(login_payload, headers)
+                )
+            )
+            _LOGGER.debug("API4: Login successful, extracting credentials")
+
+            # Extract session token
+            self.session_token = login_data.get("session")
+            if not self.session_token:
+                raise Exception("No session token in login response")
+
+            # Extract AWS credentials from 'mi' field
+            mi_field = login_data.get("mi")
+            if not mi_field:
+                raise Exception("No 'mi' field in login response")
+
+            # Decode Base64 credentials
+            try:
+                decoded = base64.b64decode(mi_field).decode("utf-8")
+                parts = decoded.split("::")
+                if len(parts) != 3:
+                    raise Exception(f"Invalid credential format. Expected 3 parts, got {len(parts)}")
+                
+                endpoint, access_key, secret_key = parts
+                self.mqtt_credentials = {
+                    "endpoint": endpoint,
+                    "access_key": access_key,
+                    "secret_key": secret_key,
+                    "session_id": self.session_token,
+                }
+                
+                # Update MQTT endpoint if not provided
+                if not self.mqtt_endpoint:
+                    self.mqtt_endpoint = endpoint
+
+                # Fresh credentials are used on the next MQTT (re)connect
+                if self.mqtt_client:
+                    self.mqtt_client.username_pw_set(access_key, secret_key)
                     
-                except Exception as e:
-                    _LOGGER.error("API7: Failed to extract credentials: %s", e)
-                    raise Exception(f"Failed to extract credentials: {e}")
+                _LOGGER.debug("API5: Credentials extracted successfully")
+                _LOGGER.debug("API6: MQTT endpoint: %s", endpoint)
+                
+            except Exception as e:
+                _LOGGER.error("API7: Failed to extract credentials: %s", e)
+                raise Exception(f"Failed to extract credentials: {e}")
 
         except Exception as e:
             _LOGGER.error("API8: Login error: %s", e)
             raise
 
-    async def get_devices(self) -> List[Dict[str, Any]]:
-        """Get list of devices."""
+    async def _request_login(
+        self, login_payload: Dict[str, Any], headers: Dict[str, str]
+    ) -> Dict[str, Any]:
+        """POST the login request and return the decoded response."""
+        started = time.monotonic()
+        async with self._session.post(
+            f"{self.base_url}/auth/login",
+            data=codec.dumps(login_payload),
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
+        ) as response:
+            body = await response.read()
+            self._record_http("POST", "/auth/login", response.status, started, login_payload, body)
+            _raise_for_rate_limit(response)
+            if not response.ok:
+                error_text = body.decode(errors="replace")
+                _LOGGER.error("API3: Login failed with status %s: %s", response.status, error_text)
+                raise _error_type(response)(f"Login failed: {response.status}")
+
+            return codec.loads(body)
+
+    async def get_devices(self, priority: int = PRIORITY_POLL) -> List[DeviceRecord]:
+        """Get list of devices.
+
+        priority is the scheduling class of the /things fetch, background
+        polls by default. The returned records are the client's own and are
+        updated in place by later fetches.
+        """
         _LOGGER.debug("API9: Fetching devices")
         
         if not self.session_token:
             raise Exception("Not logged in")
 
-        headers = DEFAULT_HEADERS.copy()
-        headers["X-APP-SESSION"] = self.session_token
-
         try:
-            async with self._session.get(
-                f"{self.base_url}/things",
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
-            ) as response:
-                if not response.ok:
-                    error_text = await response.text()
-                    _LOGGER.error("API10: Failed to fetch devices: %s", error_text)
-                    raise Exception(f"Failed to fetch devices: {response.status}")
-
-                data = await response.json()
-                _LOGGER.debug("API11: Devices fetched successfully")
-                
-                # Process devices data
-                devices = []
-                if "things" in data and "states" in data:
-                    for thing in data["things"]:
-                        device_id = thing["thing_id"]
-                        state = data["states"].get(device_id, {})
-                        
-                        device = {
-                            "id": device_id,
-                            "name": thing.get("user_config", {}).get("name", "AC"),
-                            "type": "ac",
-                            "state": state.get("state", {}),
-                            "connected": state.get("connected", False),
-                        }
-                        devices.append(device)
-                        
-                _LOGGER.debug("API12: Processed %d devices", len(devices))
-                return devices
+            data = await self._auth.call(lambda: self._fetch_things(priority))
+            _LOGGER.debug("API11: Devices fetched successfully")
+
+            # The fetch applied the document to the records, see _request_things
+            devices = list(self.devices.values()) if "things" in data and "states" in data else []
+            _LOGGER.debug("API12: Processed %d devices", len(devices))
+            return devices
 
         except Exception as e:
             _LOGGER.error("API13: Error fetching devices: %s", e)
             raise
 
+    def _apply_things(self, data: Dict[str, Any]) -> List[DeviceRecord]:
+        """Update the device records in place from a /things document."""
+        if "things" not in data or "states" not in data:
+            return []
+
+        records = self.devices
+        seen = set()
+        for thing in data["things"]:
+            device_id = thing["thing_id"]
+            state = data["states"].get(device_id, {})
+            name = thing.get("user_config", {}).get("name", "AC")
+            reported = state.get("state", {})
+            connected = state.get("connected", False)
+
+            record = records.get(device_id)
+            if record is None:
+                records[device_id] = DeviceRecord.create(device_id, name, reported, connected)
+            else:
+                record.update(name, reported, connected, replace=True)
+            self.state_cache.touch(device_id)
+            seen.add(device_id)
+
+            # MQTT may have connected before the first fetch
+            if self._mqtt_connected:
+                self._subscribe_device(device_id)
+
+        if len(seen) != len(records):
+            for device_id in records.keys() - seen:
+                del records[device_id]
+                self.state_cache.discard(device_id)
+        return list(records.values())
+
+    def restore_devices(self, devices: Dict[str, Dict[str, Any]]) -> List[DeviceRecord]:
+        """Seed the device records from stored plain data."""
+        for device_id, device in devices.items():
+            self.devices[device_id] = DeviceRecord.create(
+                device_id,
+                device.get("name", "AC"),
+                device.get("state", {}),
+                device.get("connected", False),
+            )
+        return list(self.devices.values())
+
+    async def _fetch_things(self, priority: int = PRIORITY_POLL) -> Dict[str, Any]:
+        """Return the raw /things document, shared between concurrent callers.
+
+        Confirmation fetches look for a command's result, so they never
+        take a cached document.
+        """
+        if priority == PRIORITY_CONFIRM:
+            self._things_cache.invalidate()
+        return await self._things_cache.get(lambda: self._request_things(priority))
+
+    async def _request_things(self, priority: int) -> Dict[str, Any]:
+        """Fetch the raw /things document and apply it to the device records."""
+        data = await self._breaker.call(
+            lambda: self._scheduler.run(priority, self._get_things)
+        )
+
+        if not isinstance(data, dict):
+            _LOGGER.error("API30: Invalid /things response. Expected dict")
+            raise Exception("Invalid device data structure")
+
+        self._apply_things(data)
+        return data
+
+    async def _get_things(self) -> Any:
+        """GET /things and return the decoded body."""
+        headers = DEFAULT_HEADERS.copy()
+        headers["X-APP-SESSION"] = self.session_token
+
+        started = time.monotonic()
+        async with self._session.get(
+            f"{self.base_url}/things",
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
+        ) as response:
+            body = await response.read()
+            self._record_http("GET", "/things", response.status, started, None, body)
+            _raise_for_rate_limit(response)
+            if response.status in (401, 403):
+                raise BluestarAuthError(f"Failed to fetch devices: {response.status}")
+            if not response.ok:
+                error_text = body.decode(errors="replace")
+                _LOGGER.error("API10: Failed to fetch devices: %s", error_text)
+                raise _error_type(response)(f"Failed to fetch devices: {response.status}")
+
+            return codec.loads(body)
+
+    async def _resolve_current_mode(self, device_id: str) -> int:
+        """Return the device's current mode, from cache when fresh."""
+        cached_mode = self.state_cache.get_mode(device_id)
+        if cached_mode is not None:
+            _LOGGER.debug("API31: Using cached mode %s for %s", cached_mode, device_id)
+            return cached_mode
+
+        # Cache missing or stale: fall back to the network
+        _LOGGER.debug("API32: No fresh cached state for %s, fetching /things", device_id)
+        device_data = await self._fetch_things(PRIORITY_COMMAND)
+
+        # EXACT WEBAPP METHOD: deviceData.states[deviceId]
+        if "states" in device_data:
+            current_state = device_data["states"].get(device_id)
+            if not current_state:
+                _LOGGER.error("API22: Device not found in states. Device ID: %s, Available states: %s",
+                             device_id, list(device_data["states"].keys()))
+                raise Exception("Device not found")
+            _LOGGER.debug("API22: Found device state in states: %s", current_state)
+        else:
+            # Fallback to things array if states not available
+            if "things" not in device_data:
+                _LOGGER.error("API22: No 'states' or 'things' key in response")
+                raise Exception("Invalid device data structure")
+
+            things_list = device_data["things"]
+            if not isinstance(things_list, list):
+                _LOGGER.error("API22: 'things' is not a list: %s", type(things_list))
+                raise Exception("Invalid things structure")
+
+            current_state = None
+            for device in things_list:
+                if device.get("thing_id") == device_id:
+                    current_state = device
+                    break
+
+            if not current_state:
+                _LOGGER.error("API22: Device not found in things. Device ID: %s", device_id)
+                raise Exception("Device not found")
+
+            _LOGGER.debug("API22: Found device state in things: %s", current_state)
+
+        # Determine current mode (EXACT from webapp line 275)
+        current_mode = current_state.get("state", {}).get("mode", 2)
+        if isinstance(current_mode, dict):
+            current_mode = current_mode.get("value", 2)
+        return int(current_mode)
+
+    async def prefetch_state(self, device_ids: List[str]) -> None:
+        """Make cached state cover device_ids with at most one /things fetch.
+
+        Lets a batch of commands resolve each device's current mode from the
+        cache instead of fetching /things per device.
+        """
+        if all(self.state_cache.get_mode(device_id) is not None for device_id in device_ids):
+            return
+        await self._auth.call(lambda: self._fetch_things(PRIORITY_COMMAND))
+
     async def get_device_state(self, device_id: str) -> Dict[str, Any]:
         """Get specific device state."""
-        devices = await self.get_devices()
-        for device in devices:
-            if device["id"] == device_id:
-                return device["state"]
+        await self.get_devices(PRIORITY_CONFIRM)
+        device = self.devices.get(device_id)
+        if device is not None:
+            return device.state
         raise Exception(f"Device {device_id} not found")
 
-    async def set_state(self, device_id: str, **kwargs) -> None:
+    async def set_state(self, device_id: str, **kwargs) -> Dict[str, Any]:
+        """Set device state, merging calls for the same device in a short window.
+
+        Returns the transport that delivered the command and its latency.
+        """
+        return await self._coalescer.submit(device_id, kwargs)
+
+    async def _send_state(self, device_id: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
         """Set device state using EXACT WEBAPP METHOD."""
         _LOGGER.debug("API14: Setting state for device %s: %s", device_id, kwargs)
         
@@ -201,7 +515,8 @@ class BluestarAPI:
                 control_payload["mode"] = {"value": bluestar_mode}
         
         if "target_temperature" in kwargs:
-            control_payload["stemp"] = kwargs["target_temperature"]
+            # A string, as the protocol documents, on either transport
+            control_payload["stemp"] = str(kwargs["target_temperature"])
             
         if "fan_mode" in kwargs:
             from .const import HA_FAN_SPEEDS
@@ -213,39 +528,97 @@ class BluestarAPI:
             swing_value = HA_SWING_MODES.get(kwargs["swing_mode"], 0)
             control_payload["vswing"] = swing_value
             
+        # Raw swing values, as sent by the swing selects
+        for key in ("vswing", "hswing"):
+            if key in kwargs:
+                control_payload[key] = kwargs[key]
+
         if "display" in kwargs:
             control_payload["display"] = 1 if kwargs["display"] else 0
 
         # Add timestamp and source (EXACT WEBAPP FORMAT)
-        control_payload["ts"] = int(asyncio.get_event_loop().time() * 1000)
+        control_payload["ts"] = int(time.time() * 1000)
         control_payload[SOURCE_KEY] = SOURCE_VALUE
 
         _LOGGER.debug("API15: Control payload (EXACT WEBAPP): %s", control_payload)
 
-        # EXACT WEBAPP ALGORITHM: HTTP ONLY FOR NOW (skip MQTT to isolate issue)
-        success = False
-        
-        # Step 1: Try MQTT first (EXACT WEBAPP METHOD) - DISABLED FOR DEBUGGING
+        # Step 1: Try MQTT first (EXACT WEBAPP METHOD), acknowledged by the shadow
         _LOGGER.debug("API16: MQTT status - client: %s, connected: %s", 
                      self.mqtt_client is not None, self._mqtt_connected)
-        
-        # SKIP MQTT FOR NOW TO ISOLATE HTTP ISSUE
-        _LOGGER.warning("API18: SKIPPING MQTT FOR DEBUGGING - going straight to HTTP")
-        
+
+        if self.mqtt_client and self._mqtt_connected:
+            started = time.monotonic()
+            try:
+                await self._publish_mqtt_command_acked(device_id, control_payload)
+                latency = time.monotonic() - started
+                if "mode" in control_payload:
+                    self.state_cache.set_mode(device_id, control_payload["mode"]["value"])
+                self._things_cache.invalidate()
+                _LOGGER.debug("API17: MQTT command acknowledged in %.3fs", latency)
+                return {"transport": TRANSPORT_MQTT, "latency": latency}
+            except Exception as e:
+                _LOGGER.warning("API18: MQTT command failed, falling back to HTTP: %s", e)
+
         # Step 2: HTTP fallback (EXACT WEBAPP METHOD)
+        started = time.monotonic()
         try:
             _LOGGER.debug("API19: Attempting HTTP control with payload: %s", control_payload)
-            await self._send_http_command(device_id, control_payload)
-            success = True
-            _LOGGER.debug("API20: HTTP command sent successfully")
+            await self._auth.call(
+                lambda: self._send_http_command(device_id, control_payload)
+            )
         except Exception as e:
             _LOGGER.error("API21: HTTP command failed: %s", e)
             _LOGGER.error("API21: Full error details: %s", traceback.format_exc())
-
-        if not success:
-            raise Exception("All control methods failed")
-
-    async def _publish_mqtt_command(self, device_id: str, payload: Dict[str, Any]) -> None:
+            raise Exception("All control methods failed") from e
+
+        latency = time.monotonic() - started
+        self._things_cache.invalidate()
+        _LOGGER.debug("API20: HTTP command sent successfully in %.3fs", latency)
+        return {"transport": TRANSPORT_HTTP, "latency": latency}
+
+    async def _publish_mqtt_command_acked(
+        self, device_id: str, payload: Dict[str, Any]
+    ) -> None:
+        """Publish a desired-state update and wait for the shadow to accept it."""
+        self._subscribe_device(device_id)
+
+        key = (device_id, payload["ts"])
+        future = asyncio.get_running_loop().create_future()
+        self._pending_acks[key] = future
+        try:
+            await self._publish_mqtt_command(device_id, payload, str(payload["ts"]))
+            accepted = await asyncio.wait_for(future, DEFAULT_MQTT_TIMEOUT)
+        except asyncio.TimeoutError as e:
+            raise Exception(f"No shadow acknowledgement within {DEFAULT_MQTT_TIMEOUT}s") from e
+        finally:
+            self._pending_acks.pop(key, None)
+
+        if not accepted:
+            raise Exception("Shadow update rejected")
+
+    def _resolve_ack(self, key: tuple, accepted: bool) -> None:
+        """Complete a pending shadow acknowledgement."""
+        future = self._pending_acks.get(key)
+        if future and not future.done():
+            future.set_result(accepted)
+
+    def _subscribe_device(self, device_id: str) -> None:
+        """Subscribe to a device's shadow update responses once.
+
+        update/accepted carries both command acknowledgements and the
+        reported state the device pushes, so it doubles as the push feed.
+        """
+        if device_id in self._mqtt_subscribed or not self.mqtt_client:
+            return
+        self.mqtt_client.subscribe([
+            (MQTT_UPDATE_ACCEPTED_TOPIC.format(device_id=device_id), MQTT_QOS),
+            (MQTT_UPDATE_REJECTED_TOPIC.format(device_id=device_id), MQTT_QOS),
+        ])
+        self._mqtt_subscribed.add(device_id)
+
+    async def _publish_mqtt_command(
+        self, device_id: str, payload: Dict[str, Any], client_token: Optional[str] = None
+    ) -> None:
         """Publish MQTT command."""
         if not self.mqtt_client or not self._mqtt_connected:
             raise Exception("MQTT not connected")
@@ -256,18 +629,14 @@ class BluestarAPI:
                 "desired": payload
             }
         }
+        if client_token is not None:
+            mqtt_payload["clientToken"] = client_token
 
         topic = MQTT_STATE_UPDATE_TOPIC.format(device_id=device_id)
         
-        # Publish in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None,
-            self.mqtt_client.publish,
-            topic,
-            json.dumps(mqtt_payload),
-            MQTT_QOS
-        )
+        # Non-blocking: the socket is serviced by the event loop
+        await self._scheduler.acquire(PRIORITY_COMMAND)
+        self._mqtt_publish(topic, codec.dumps(mqtt_payload))
 
     async def _send_http_command(self, device_id: str, payload: Dict[str, Any]) -> None:
         """Send HTTP command using EXACT WEBAPP METHOD."""
@@ -275,57 +644,8 @@ class BluestarAPI:
         headers = DEFAULT_HEADERS.copy()
         headers["X-APP-SESSION"] = self.session_token
 
-        # EXACT WEBAPP METHOD: Get current device state to determine mode
-        async with self._session.get(
-            f"{self.base_url}/things",
-            headers=headers,
-            timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
-        ) as response:
-            if not response.ok:
-                raise Exception(f"Failed to fetch device state: {response.status}")
-            
-            device_data = await response.json()
-            _LOGGER.debug("API22: Device data response: %s", device_data)
-            _LOGGER.debug("API22: Device data type: %s", type(device_data))
-            
-            # EXACT WEBAPP METHOD: deviceData.states[deviceId]
-            if not isinstance(device_data, dict):
-                _LOGGER.error("API22: Invalid device data structure. Expected dict")
-                raise Exception("Invalid device data structure")
-            
-            # Check if we have states key (EXACT webapp method)
-            if "states" in device_data:
-                current_state = device_data["states"].get(device_id)
-                if not current_state:
-                    _LOGGER.error("API22: Device not found in states. Device ID: %s, Available states: %s", 
-                                 device_id, list(device_data["states"].keys()))
-                    raise Exception("Device not found")
-                _LOGGER.debug("API22: Found device state in states: %s", current_state)
-            else:
-                # Fallback to things array if states not available
-                if "things" not in device_data:
-                    _LOGGER.error("API22: No 'states' or 'things' key in response")
-                    raise Exception("Invalid device data structure")
-                
-                things_list = device_data["things"]
-                if not isinstance(things_list, list):
-                    _LOGGER.error("API22: 'things' is not a list: %s", type(things_list))
-                    raise Exception("Invalid things structure")
-                
-                current_state = None
-                for device in things_list:
-                    if device.get("thing_id") == device_id:
-                        current_state = device
-                        break
-                
-                if not current_state:
-                    _LOGGER.error("API22: Device not found in things. Device ID: %s", device_id)
-                    raise Exception("Device not found")
-                
-                _LOGGER.debug("API22: Found device state in things: %s", current_state)
-
-        # Determine current mode (EXACT from webapp line 275)
-        current_mode = current_state.get("state", {}).get("mode", 2)
+        # Resolve current mode from the state cache (network only when stale)
+        current_mode = await self._resolve_current_mode(device_id)
         
         # If mode is being changed, use the new mode (EXACT from webapp lines 278-285)
         if "mode" in payload:
@@ -372,70 +692,114 @@ class BluestarAPI:
         _LOGGER.debug("API22: URL: %s", f"{self.base_url}/things/{device_id}/preferences")
         _LOGGER.debug("API22: Headers: %s", headers)
 
+        # Preferences hold absolute values, so a retried POST is harmless
+        await self._breaker.call(
+            lambda: self._scheduler.run(
+                PRIORITY_COMMAND,
+                lambda: self._post_preferences(device_id, preferences_payload, headers),
+            )
+        )
+
+        # Remember an accepted mode change so the next command needs no fetch
+        if "mode" in payload:
+            self.state_cache.set_mode(device_id, current_mode)
+
+    async def _post_preferences(
+        self, device_id: str, preferences_payload: Dict[str, Any], headers: Dict[str, str]
+    ) -> None:
+        """POST a preferences update for one device."""
+        path = f"/things/{device_id}/preferences"
+        started = time.monotonic()
         async with self._session.post(
-            f"{self.base_url}/things/{device_id}/preferences",
-            json=preferences_payload,
+            f"{self.base_url}{path}",
+            data=codec.dumps(preferences_payload),
             headers=headers,
             timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT),
         ) as response:
             _LOGGER.debug("API22: Response status: %s", response.status)
+            body = await response.read()
+            self._record_http("POST", path, response.status, started, preferences_payload, body)
+            _raise_for_rate_limit(response)
+            if response.status in (401, 403):
+                raise BluestarAuthError(f"HTTP command failed: {response.status}")
             if not response.ok:
-                error_text = await response.text()
+                error_text = body.decode(errors="replace")
                 _LOGGER.error("API22: HTTP error response: %s", error_text)
-                raise Exception(f"HTTP command failed: {response.status} - {error_text}")
+                raise _error_type(response)(
+                    f"HTTP command failed: {response.status} - {error_text}"
+                )
             else:
-                response_text = await response.text()
-                _LOGGER.debug("API22: HTTP success response: %s", response_text)
+                _LOGGER.debug("API22: HTTP success response: %s", body)
 
-    async def _force_sync_device(self, device_id: str) -> None:
-        """Force sync device state (EXACT WEBAPP METHOD)."""
-        if not self.mqtt_client or not self._mqtt_connected:
-            raise Exception("MQTT not connected")
-
-        # Create force sync payload (EXACT WEBAPP FORMAT)
-        force_sync_payload = {FORCE_FETCH_KEY: 1}
-        
-        # Add source
-        force_sync_payload[SOURCE_KEY] = SOURCE_VALUE
-        
-        # Create MQTT payload structure
-        mqtt_payload = {
-            "state": {
-                "desired": force_sync_payload
-            }
-        }
+    def _record_http(
+        self,
+        method: str,
+        path: str,
+        status: int,
+        started: float,
+        request: Optional[Dict[str, Any]],
+        body: bytes,
+    ) -> None:
+        """Pass an HTTP exchange to the recorder, if one is attached."""
+        if self.recorder is not None:
+            self.recorder.http(
+                method, path, status, time.monotonic() - started, request, decode_body(body)
+            )
 
-        topic = MQTT_STATE_UPDATE_TOPIC.format(device_id=device_id)
-        
-        # Publish in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None,
-            self.mqtt_client.publish,
-            topic,
-            json.dumps(mqtt_payload),
-            MQTT_QOS
-        )
+    async def force_sync(self, device_id: str) -> bool:
+        """Ask a device to report its full state over MQTT.
 
-    async def connect_mqtt(self, on_message: Callable) -> None:
-        """Connect to MQTT broker."""
+        Returns False, without sending anything, while MQTT is not
+        connected; the caller then fetches the state over HTTP instead.
+        """
+        if not self.mqtt_client or not self._mqtt_connected:
+            return False
+        await self._scheduler.acquire(PRIORITY_COMMAND)
+        topic = MQTT_CONTROL_TOPIC.format(device_id=device_id)
+        self._mqtt_publish(topic, codec.dumps({FORCE_FETCH_KEY: 1}))
+        return True
+
+    def _mqtt_publish(self, topic: str, payload: bytes) -> None:
+        """Queue a publish on the loop-driven MQTT client."""
+        if self.recorder is not None:
+            self.recorder.mqtt(EVENT_MQTT_OUT, topic, decode_body(payload))
+        info = self.mqtt_client.publish(topic, payload, MQTT_QOS)
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            raise Exception(f"MQTT publish failed: {mqtt.error_string(info.rc)}")
+
+    async def connect_mqtt(
+        self,
+        on_message: Callable[[Dict[str, Dict[str, Any]]], None],
+        on_connection_change: Optional[Callable[[bool], None]] = None,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ) -> None:
+        """Connect to MQTT broker.
+
+        on_message is called in the event loop with a batch of pushed state
+        deltas keyed by device ID; on_connection_change with the new
+        connection state. A prebuilt ssl_context skips creating one; it is
+        not used when the client was created with mqtt_tls=False.
+        """
         _LOGGER.debug("API19: Connecting to MQTT")
         
         if not self.mqtt_credentials:
             raise Exception("No MQTT credentials available")
 
-        self._mqtt_message_callback = on_message
+        self._mqtt_connection_callback = on_connection_change
 
-        # Create SSL context in executor
         loop = asyncio.get_event_loop()
-        ssl_context = await loop.run_in_executor(None, ssl.create_default_context)
+        self._push_bridge = PushBridge(loop, on_message, MQTT_PUSH_QUEUE_SIZE)
+        if self.mqtt_tls and ssl_context is None:
+            # Loading the CA bundle blocks, so do it in the executor
+            ssl_context = await loop.run_in_executor(None, ssl.create_default_context)
 
         # Create MQTT client
         client_id = f"u-{self.mqtt_credentials['session_id']}"
         self.mqtt_client = mqtt.Client(client_id=client_id)
         
         # Configure AWS IoT authentication
-        self.mqtt_client.tls_set_context(ssl_context)
+        if self.mqtt_tls:
+            self.mqtt_client.tls_set_context(ssl_context)
         self.mqtt_client.username_pw_set(
             self.mqtt_credentials["access_key"],
             self.mqtt_credentials["secret_key"]
@@ -446,55 +810,166 @@ class BluestarAPI:
         self.mqtt_client.on_message = self._on_mqtt_message
         self.mqtt_client.on_disconnect = self._on_mqtt_disconnect
         self.mqtt_client.on_error = self._on_mqtt_error
+        self._mqtt_loop = AsyncioMQTTLoop(loop, self.mqtt_client)
+        self._mqtt_closing = False
 
-        # Connect
         try:
+            await self._mqtt_connect_once(initial=True)
+            _LOGGER.debug("API20: MQTT connected successfully")
+        except Exception as e:
+            _LOGGER.error("API21: MQTT connection failed: %s", e)
+            self._mqtt_lost.set()
+            raise
+        finally:
+            # The supervisor heals the connection from here on, including
+            # when this first attempt failed
+            if self._mqtt_supervisor is None or self._mqtt_supervisor.done():
+                self._mqtt_supervisor = loop.create_task(self._supervise_mqtt())
+
+    async def _mqtt_connect_once(self, initial: bool) -> None:
+        """Open the MQTT connection and wait for CONNACK."""
+        loop = asyncio.get_running_loop()
+        self._mqtt_connack = loop.create_future()
+
+        # paho's blocking TCP/TLS handshake is the only executor hop,
+        # after that all network I/O is driven by the event loop
+        if initial:
             await loop.run_in_executor(
                 None,
                 self.mqtt_client.connect,
                 self.mqtt_endpoint,
-                443,
+                self.mqtt_port,
                 MQTT_KEEPALIVE
             )
-            
-            # Start loop
-            self.mqtt_client.loop_start()
-            
-            # Wait for connection
-            await asyncio.sleep(1)
-            if not self._mqtt_connected:
-                raise Exception("MQTT connection timeout")
-                
-            _LOGGER.debug("API20: MQTT connected successfully")
-            
-        except Exception as e:
-            _LOGGER.error("API21: MQTT connection failed: %s", e)
-            raise
+        else:
+            await loop.run_in_executor(None, self.mqtt_client.reconnect)
+
+        try:
+            rc = await asyncio.wait_for(self._mqtt_connack, MQTT_CONNECT_TIMEOUT)
+        except asyncio.TimeoutError as e:
+            self.mqtt_client.disconnect()
+            raise Exception(f"No CONNACK within {MQTT_CONNECT_TIMEOUT}s") from e
+        if rc != 0:
+            raise Exception(f"MQTT connection refused: {mqtt.connack_string(rc)}")
+
+    async def _supervise_mqtt(self) -> None:
+        """Reconnect with jittered exponential backoff whenever MQTT drops."""
+        attempt = 0
+        while not self._mqtt_closing:
+            await self._mqtt_lost.wait()
+            if self._mqtt_closing:
+                break
+
+            period = min(MQTT_RECONNECT_PERIOD * 2 ** attempt, MQTT_RECONNECT_MAX_PERIOD)
+            delay = random.uniform(0.5, 1.0) * period / 1000
+            _LOGGER.debug("API33: MQTT reconnect attempt %d in %.1fs", attempt + 1, delay)
+            await asyncio.sleep(delay)
+            if self._mqtt_closing:
+                break
+
+            try:
+                if self._mqtt_refresh_credentials:
+                    # Credentials were rejected: a fresh login re-decodes 'mi'
+                    await self.login()
+                    self._mqtt_refresh_credentials = False
+                await self._mqtt_connect_once(initial=False)
+                attempt = 0
+                _LOGGER.info("API34: MQTT reconnected")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # pylint: disable=broad-except
+                attempt += 1
+                self._mqtt_lost.set()
+                _LOGGER.warning("API35: MQTT reconnect failed: %s", e)
 
     def _on_mqtt_connect(self, client, userdata, flags, rc):
         """Handle MQTT connect."""
+        if self._mqtt_connack and not self._mqtt_connack.done():
+            self._mqtt_connack.set_result(rc)
+
         if rc == 0:
             self._mqtt_connected = True
+            self._mqtt_lost.clear()
+            self.state_cache.set_live(True)
             _LOGGER.debug("API22: MQTT connected")
+
+            # (Re)subscribe shadow topics for every known device
+            known_devices = set(self._mqtt_subscribed) | set(self.devices)
+            self._mqtt_subscribed.clear()
+            for device_id in known_devices:
+                self._subscribe_device(device_id)
+            self._notify_connection_change(True)
         else:
             _LOGGER.error("API23: MQTT connection failed with code %s", rc)
+            if rc in (mqtt.CONNACK_REFUSED_BAD_USERNAME_PASSWORD, mqtt.CONNACK_REFUSED_NOT_AUTHORIZED):
+                self._mqtt_refresh_credentials = True
 
     def _on_mqtt_message(self, client, userdata, msg):
         """Handle MQTT message."""
         try:
-            payload = json.loads(msg.payload.decode())
+            payload = codec.loads(msg.payload)
             _LOGGER.debug("API24: MQTT message received: %s", payload)
-            
-            if self._mqtt_message_callback:
-                self._mqtt_message_callback(payload)
+            if self.recorder is not None:
+                self.recorder.mqtt(EVENT_MQTT_IN, msg.topic, payload)
+
+            device_id = _device_id_from_topic(msg.topic)
+
+            # Shadow acknowledgements for commands published with a ts
+            if device_id and msg.topic.endswith(("/update/accepted", "/update/rejected")):
+                ts = _desired_ts(payload)
+                if ts is not None:
+                    self._resolve_ack((device_id, ts), msg.topic.endswith("/accepted"))
+
+            delta = parse_shadow_delta(payload) if device_id else None
+            if not delta:
+                return
+
+            # Keep the command path's state cache warm from pushes
+            if "state" in delta:
+                self.state_cache.update_state(device_id, delta["state"])
+
+            # Merged per device and delivered once per loop iteration
+            if self._push_bridge:
+                self._push_bridge.post(device_id, delta)
                 
         except Exception as e:
             _LOGGER.error("API25: Error processing MQTT message: %s", e)
 
     def _on_mqtt_disconnect(self, client, userdata, rc):
         """Handle MQTT disconnect."""
+        was_connected = self._mqtt_connected
         self._mqtt_connected = False
-        _LOGGER.debug("API26: MQTT disconnected")
+        self.state_cache.set_live(False)
+        _LOGGER.debug("API26: MQTT disconnected (rc=%s)", rc)
+        if not self._mqtt_closing:
+            self._mqtt_lost.set()
+        if was_connected:
+            self._notify_connection_change(False)
+
+    def _notify_connection_change(self, connected: bool) -> None:
+        """Report a push channel state change."""
+        if self._mqtt_connection_callback:
+            self._mqtt_connection_callback(connected)
+
+    @property
+    def push_stats(self) -> Dict[str, int]:
+        """Return push queue depth, merge and drop counters."""
+        return self._push_bridge.stats if self._push_bridge else {}
+
+    @property
+    def request_stats(self) -> Dict[str, Any]:
+        """Return request queue depth, throttle count and wait times."""
+        return self._scheduler.stats
+
+    @property
+    def circuit_open(self) -> bool:
+        """Return True while cloud calls are short-circuited after failures."""
+        return self._breaker.is_open
+
+    @property
+    def mqtt_connected(self) -> bool:
+        """Return True while the MQTT push channel is connected."""
+        return self._mqtt_connected
 
     def _on_mqtt_error(self, client, userdata, error):
         """Handle MQTT error."""
@@ -502,15 +977,25 @@ class BluestarAPI:
 
     async def disconnect_mqtt(self) -> None:
         """Disconnect from MQTT broker."""
+        self._mqtt_closing = True
+        self._mqtt_lost.set()
+        if self._mqtt_supervisor:
+            self._mqtt_supervisor.cancel()
+            self._mqtt_supervisor = None
         if self.mqtt_client:
-            self.mqtt_client.loop_stop()
             self.mqtt_client.disconnect()
+            if self._mqtt_loop:
+                self._mqtt_loop.stop()
             self._mqtt_connected = False
+            self.state_cache.set_live(False)
             _LOGGER.debug("API28: MQTT disconnected")
 
     async def close(self) -> None:
         """Close the API client."""
+        self._coalescer.cancel()
+        self._auth.cancel()
+        self._scheduler.cancel()
         await self.disconnect_mqtt()
-        if self._session:
+        if self._session and self._owns_session:
             await self._session.close()
         _LOGGER.debug("API29: API client closed")
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Bluestar Smart AC local state caches."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .models import DeviceRecord
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DeviceStateCache:
+    """Freshness of each device's record, for the command path.
+
+    State is read from the API's device records; the cache only keeps when
+    each record was last refreshed. A record is fresh for max_age seconds,
+    or until the coordinator's next poll when that is further away.
+    Records refreshed while MQTT pushes keep them current do not age at
+    all. Modes that are newer than the record, accepted commands and
+    pushes not yet applied by the coordinator, are held until the next
+    poll.
+    """
+
+    def __init__(self, max_age: float, records: Dict[str, DeviceRecord]):
+        """Initialize the cache over the API's device records."""
+        self.max_age = max_age
+        # Current coordinator poll interval, set by the coordinator
+        self.poll_interval = 0.0
+        self._records = records
+        self._updated: Dict[str, float] = {}
+        self._modes: Dict[str, Any] = {}
+        # When the push channel last came up, None while it is down
+        self._live_since: Optional[float] = None
+
+    def touch(self, device_id: str) -> None:
+        """Note that a poll just refreshed a device's record."""
+        self._updated[device_id] = time.monotonic()
+        self._modes.pop(device_id, None)
+
+    def update_state(self, device_id: str, state: Dict[str, Any]) -> None:
+        """Note a pushed state delta for a device."""
+        if not isinstance(state, dict):
+            return
+        self._updated[device_id] = time.monotonic()
+        if "mode" in state:
+            self._modes[device_id] = state["mode"]
+
+    def discard(self, device_id: str) -> None:
+        """Forget a device that is gone from the account."""
+        self._updated.pop(device_id, None)
+        self._modes.pop(device_id, None)
+
+    def set_live(self, live: bool) -> None:
+        """Mark whether MQTT pushes are keeping the records current."""
+        self._live_since = time.monotonic() if live else None
+
+    def is_fresh(self, device_id: str) -> bool:
+        """Return True if the device's record is recent enough to act on."""
+        updated = self._updated.get(device_id)
+        if updated is None:
+            return False
+        if self._live_since is not None and updated >= self._live_since:
+            # Any later change would have arrived as a push
+            return True
+        age = time.monotonic() - updated
+        if age > max(self.max_age, self.poll_interval):
+            _LOGGER.debug("CA1: Cached state for %s is stale (%.1fs)", device_id, age)
+            return False
+        return True
+
+    def get_mode(self, device_id: str) -> Optional[int]:
+        """Return the current mode, or None if unknown or stale."""
+        if not self.is_fresh(device_id):
+            return None
+        mode = self._modes.get(device_id)
+        if mode is None:
+            record = self._records.get(device_id)
+            if record is None:
+                return None
+            mode = record.state.get("mode")
+        if isinstance(mode, dict):
+            mode = mode.get("value")
+        try:
+            return int(mode)
+        except (TypeError, ValueError):
+            return None
+
+    def set_mode(self, device_id: str, mode: int) -> None:
+        """Record a mode change that has been accepted by the cloud."""
+        self._updated[device_id] = time.monotonic()
+        self._modes[device_id] = mode
+
+
+class SingleFlightCache:
+    """Share one in-flight fetch between callers and cache its result briefly."""
+
+    def __init__(self, ttl: float):
+        """Initialize the cache."""
+        self.ttl = ttl
+        self._value: Any = None
+        self._fetched_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._generation = 0
+
+    async def get(self, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value, joining or starting a fetch when needed."""
+        if self._fetched_at is not None and time.monotonic() - self._fetched_at <= self.ttl:
+            return self._value
+
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.get_running_loop().create_task(
+                self._fetch(fetch, self._generation)
+            )
+        else:
+            _LOGGER.debug("CA2: Joining in-flight fetch")
+        return await asyncio.shield(self._inflight)
+
+    async def _fetch(self, fetch: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        """Fetch and cache, unless invalidated while the request was in flight."""
+        value = await fetch()
+        if generation == self._generation:
+            self._value = value
+            self._fetched_at = time.monotonic()
+        return value
+
+    def invalidate(self) -> None:
+        """Drop the cached value; in-flight results will not be cached."""
+        self._generation += 1
+        self._value = None
+        self._fetched_at = None
+        self._inflight = None
@@ -0,0 +1,87 @@
+"""Bluestar Smart AC per-device command coalescing."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Set
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CommandCoalescer:
+    """Merge commands for the same device arriving within a short window.
+
+    Fields are merged last-write-wins, one merged command is sent when the
+    window closes, and every caller that contributed to the batch receives
+    that command's result (or exception).
+    """
+
+    def __init__(
+        self,
+        window: float,
+        send: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+    ):
+        """Initialize the coalescer."""
+        self.window = window
+        self._send = send
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        # The loop only keeps weak references to tasks
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def submit(self, device_id: str, fields: Dict[str, Any]) -> Any:
+        """Queue fields for a device and wait for the merged command."""
+        if self.window <= 0:
+            return await self._send(device_id, dict(fields))
+
+        loop = asyncio.get_running_loop()
+        self._pending.setdefault(device_id, {}).update(fields)
+        future = loop.create_future()
+        self._waiters.setdefault(device_id, []).append(future)
+
+        if device_id not in self._timers:
+            self._timers[device_id] = loop.call_later(
+                self.window, self._start_flush, device_id
+            )
+        else:
+            _LOGGER.debug("CO1: Coalescing %s into pending command for %s", fields, device_id)
+
+        return await future
+
+    def _start_flush(self, device_id: str) -> None:
+        """Close the window for a device and send its merged command."""
+        self._timers.pop(device_id, None)
+        fields = self._pending.pop(device_id, {})
+        waiters = self._waiters.pop(device_id, [])
+        task = asyncio.get_running_loop().create_task(self._flush(device_id, fields, waiters))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(
+        self, device_id: str, fields: Dict[str, Any], waiters: List[asyncio.Future]
+    ) -> None:
+        """Send one merged command and resolve every waiter."""
+        _LOGGER.debug("CO2: Sending merged command for %s from %d calls: %s",
+                      device_id, len(waiters), fields)
+        try:
+            result = await self._send(device_id, fields)
+        except Exception as e:  # pylint: disable=broad-except
+            for future in waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future in waiters:
+            if not future.done():
+                future.set_result(result)
+
+    def cancel(self) -> None:
+        """Cancel all pending windows and fail their waiters."""
+        for handle in self._timers.values():
+            handle.cancel()
+        self._timers.clear()
+        self._pending.clear()
+        for waiters in self._waiters.values():
+            for future in waiters:
+                if not future.done():
+                    future.cancel()
+        self._waiters.clear()
@@ -8,6 +8,7 @@ from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .api import BluestarAPI
 from .const import DOMAIN
@@ -68,7 +69,7 @@ class BluestarConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Test credentials by attempting to login."""
         _LOGGER.debug("CF8: Testing credentials for phone %s", phone)
         
-        api = BluestarAPI(phone, password)
+        api = BluestarAPI(phone, password, session=async_get_clientsession(self.hass))
         try:
             await api.login()
             _LOGGER.debug("CF9: Login successful")
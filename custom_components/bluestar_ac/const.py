@@ -8,18 +8,74 @@ BLUESTAR_MQTT_ENDPOINT = "a1b2c3d4e5f6g7-ats.iot.ap-south-1.amazonaws.com"  # Wi
 
 # Default Configuration
 DEFAULT_POLL_SECONDS = 30
+PUSH_POLL_SECONDS = 300  # Safety-net poll while MQTT pushes are healthy
+COMMAND_POLL_SECONDS = 3  # Poll interval while confirming a command
+COMMAND_POLL_BURST = 15  # Seconds of fast polling after a command
+IDLE_POLL_BACKOFF = 1.5  # Interval growth per poll that changed nothing
+IDLE_POLL_MAX_SECONDS = 120
+OPTIMISTIC_TIMEOUT = 20  # Seconds a commanded state is shown before rolling back
+OPTIMISTIC_TOLERANCE = 0.5  # Allowed drift (C) when confirming a temperature
 DEFAULT_TIMEOUT = 10
 DEFAULT_MQTT_TIMEOUT = 5
+DEFAULT_STATE_CACHE_MAX_AGE = 90  # Seconds before cached device state needs a refetch
+DEFAULT_COMMAND_COALESCE_WINDOW = 0.3  # Seconds to merge back-to-back commands per device
+DEFAULT_THINGS_CACHE_TTL = 5  # Seconds a parsed /things response is reused
+
+# Session Configuration (token TTL is undocumented, spec assumes 24 hours)
+SESSION_TOKEN_TTL = 24 * 3600
+SESSION_REFRESH_MARGIN = 3600  # Refresh this long before the assumed expiry
+SESSION_REFRESH_RETRY = 300
+
+# Device Snapshot Storage
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60  # Seconds to batch snapshot writes
+
+# HTTP Connection Pool (used when no shared session is injected)
+HTTP_LIMIT_PER_HOST = 8
+HTTP_KEEPALIVE_TIMEOUT = 120  # Keep idle connections so polls skip TCP/TLS setup
+HTTP_DNS_CACHE_TTL = 300
+
+# Services
+BULK_MAX_CONCURRENCY = 10  # Default cap on commands in flight for bulk_set_state
+SNAPSHOT_SAVE_DELAY = 5  # Seconds to batch writes of saved snapshots
+RESTORE_TEMPERATURE_TOLERANCE = 0.5  # Difference (C) that makes restore resend
+RECORDING_VERSION = 1  # Format version written to traffic recordings
+RECORDER_FLUSH_SECONDS = 1  # Seconds to batch writes of recorded traffic
+
+# Request Scheduling (cloud rate limits are undocumented)
+REQUEST_RATE = 5  # Tokens per second shared by the whole account
+REQUEST_BURST = 10
+RATE_LIMIT_RETRIES = 2  # Times a throttled (429) request is queued again
+RATE_LIMIT_DEFAULT_DELAY = 5  # Seconds to pause on a 429 without Retry-After
+
+# Retries and Circuit Breaker (login, /things and preferences POST)
+RETRY_ATTEMPTS = 2  # Extra attempts for a transient failure
+RETRY_BASE_DELAY = 0.5  # Seconds, doubled per attempt with full jitter
+RETRY_MAX_DELAY = 5
+BREAKER_THRESHOLD = 3  # Consecutive failed calls that open the circuit
+BREAKER_RESET_SECONDS = 60  # Open time before a trial call is let through
+FAILURE_POLL_MAX_SECONDS = 900  # Poll interval ceiling while the circuit is open
+STALE_STATE_MAX_AGE = 3600  # Seconds last known state is served during an outage
 
 # MQTT Configuration
+MQTT_PORT = 443
 MQTT_KEEPALIVE = 30
-MQTT_RECONNECT_PERIOD = 1000
+MQTT_RECONNECT_PERIOD = 1000  # Initial reconnect backoff (ms)
+MQTT_RECONNECT_MAX_PERIOD = 120000  # Reconnect backoff ceiling (ms)
+MQTT_CONNECT_TIMEOUT = 30  # Seconds to wait for CONNACK
 MQTT_QOS = 0
+MQTT_PUSH_QUEUE_SIZE = 1000  # Max devices with a pending pushed update
 
 # MQTT Topics
 MQTT_STATE_UPDATE_TOPIC = "$aws/things/{device_id}/shadow/update"
+MQTT_UPDATE_ACCEPTED_TOPIC = "$aws/things/{device_id}/shadow/update/accepted"
+MQTT_UPDATE_REJECTED_TOPIC = "$aws/things/{device_id}/shadow/update/rejected"
 MQTT_CONTROL_TOPIC = "things/{device_id}/control"
 
+# Command Transports
+TRANSPORT_MQTT = "mqtt"
+TRANSPORT_HTTP = "http"
+
 # Control Parameters
 FORCE_FETCH_KEY = "fpsh"
 SOURCE_KEY = "src"
@@ -92,5 +148,6 @@ DEFAULT_HEADERS = {
     "X-OS-NAME": "Android", 
     "X-OS-VER": "v13-33",
     "User-Agent": "com.bluestarindia.bluesmart",
-    "Content-Type": "application/json"
+    "Content-Type": "application/json",
+    "Accept-Encoding": "gzip, deflate"
 }
\ No newline at end of file
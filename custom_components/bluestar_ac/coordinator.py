@@ -1,68 +1,297 @@
 """Bluestar Smart AC coordinator."""
 
 import logging
+import time
 from datetime import timedelta
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Optional, Set
 
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .api import BluestarAPI
+from .const import (
+    COMMAND_POLL_BURST,
+    COMMAND_POLL_SECONDS,
+    DEFAULT_POLL_SECONDS,
+    FAILURE_POLL_MAX_SECONDS,
+    IDLE_POLL_BACKOFF,
+    IDLE_POLL_MAX_SECONDS,
+    PUSH_POLL_SECONDS,
+    STALE_STATE_MAX_AGE,
+    STORAGE_SAVE_DELAY,
+)
+from .models import EMPTY_VIEW, DeviceRecord, DeviceStateView, decode_state
+from .scheduler import PRIORITY_CONFIRM, PRIORITY_POLL
 
 _LOGGER = logging.getLogger(__name__)
 
+# Backoff exponents are capped so a long idle or outage cannot overflow a float
+MAX_BACKOFF_STEPS = 32
 
 class BluestarCoordinator(DataUpdateCoordinator):
     """Bluestar Smart AC data coordinator."""
 
-    def __init__(self, hass, api: BluestarAPI):
+    def __init__(self, hass, api: BluestarAPI, store: Optional[Store] = None):
         """Initialize the coordinator."""
         super().__init__(
             hass,
             _LOGGER,
             name="BluestarCoordinator",
-            update_interval=timedelta(seconds=30),
+            update_interval=timedelta(seconds=DEFAULT_POLL_SECONDS),
         )
         self.api = api
+        # Changed keys per device for the update being published (None = all)
+        self._changed: Optional[Dict[str, Optional[Set[str]]]] = None
+        # Record revision per device as of the last published update
+        self._seen: Dict[str, int] = {}
+        # Decoded state per device, rebuilt only for devices that changed
+        self.views: Dict[str, DeviceStateView] = {}
+        # Last device snapshot on disk, and whether data still comes from it
+        self._store = store
+        self.stale = False
+        # Adaptive polling inputs
+        self._push_healthy = False
+        self._idle_polls = 0
+        self._burst_until = 0.0
+        self._failed_polls = 0
+        self._confirmed_at = 0.0
 
-    async def _async_update_data(self) -> Dict[str, Any]:
+    async def async_load_snapshot(self) -> bool:
+        """Seed data from the stored snapshot without touching the cloud."""
+        if self._store is None:
+            return False
+        snapshot = await self._store.async_load()
+        if not snapshot or not snapshot.get("devices"):
+            return False
+
+        _LOGGER.debug("C10: Restored %d devices from snapshot", len(snapshot["devices"]))
+        self.api.restore_devices(snapshot["devices"])
+        self.stale = True
+        self._confirmed_at = time.monotonic()
+        self._changed = None
+        self._collect_changes(self.api.devices)
+        self._update_views(self.api.devices)
+        self.data = self.api.devices
+        return True
+
+    @callback
+    def _save_snapshot(self) -> None:
+        """Schedule a batched write of the current devices to storage."""
+        if self._store is not None:
+            self._store.async_delay_save(
+                lambda: {
+                    "devices": {
+                        device_id: device.as_dict()
+                        for device_id, device in (self.data or {}).items()
+                    }
+                },
+                STORAGE_SAVE_DELAY,
+            )
+
+    async def _async_update_data(self) -> Dict[str, DeviceRecord]:
         """Fetch data from API."""
         _LOGGER.debug("C1: Starting data update")
         
         try:
-            devices = await self.api.get_devices()
+            # Polls inside a command burst confirm its result
+            priority = PRIORITY_CONFIRM if time.monotonic() < self._burst_until else PRIORITY_POLL
+            devices = await self.api.get_devices(priority)
+        except Exception as e:
+            self._failed_polls += 1
+            self._apply_poll_interval()
+            if self.data is not None and time.monotonic() - self._confirmed_at < STALE_STATE_MAX_AGE:
+                # Keep serving the last known state instead of flapping availability
+                _LOGGER.warning("C11: Cloud unavailable, serving last known state: %s", e)
+                # Only the stale flag changes, and only on the first failure
+                self._changed = {} if self.stale else None
+                self.stale = True
+                return self.data
+            _LOGGER.exception("C5: Data update failed: %s", e)
+            raise UpdateFailed(f"Failed to update data: {e}") from e
+
+        try:
             if not devices:
                 _LOGGER.warning("C2: No devices returned from API")
+                self._changed = None
+                self._seen = {}
+                self.views = {}
                 return {}
-                
-            # Convert devices list to dict keyed by device ID
-            data = {}
-            for device in devices:
-                device_id = device["id"]
-                data[device_id] = device
-                
+
+            # The API's records are updated in place, so this is the same dict every poll
+            data = self.api.devices
             _LOGGER.debug("C3: Data update successful, %d devices", len(data))
-            _LOGGER.debug("C4: First 300 chars of data: %s", str(data)[:300])
-            
+
+            changed = self._collect_changes(data)
+            self._changed = None if self.data is None or self.stale else changed
+            _LOGGER.debug("C9: Changed keys per device: %s", self._changed)
+            self._failed_polls = 0
+            self._confirmed_at = time.monotonic()
+            if self._changed is None or self._changed:
+                self._idle_polls = 0
+                # Covers the stale flag being cleared; idle polls leave the file alone
+                self._save_snapshot()
+            else:
+                self._idle_polls += 1
+            self._apply_poll_interval()
+            self.stale = False
+            self._update_views(data)
+
             return data
             
         except Exception as e:
             _LOGGER.exception("C5: Data update failed: %s", e)
             raise UpdateFailed(f"Failed to update data: {e}") from e
 
-    def get_device(self, device_id: str) -> Dict[str, Any]:
+    @callback
+    def async_handle_push(self, deltas: Dict[str, Dict[str, Any]]) -> None:
+        """Merge a batch of pushed MQTT state deltas into the coordinator data."""
+        if not self.data:
+            return
+
+        changed: Dict[str, Optional[Set[str]]] = {}
+        for device_id, delta in deltas.items():
+            device = self.data.get(device_id)
+            if device is None:
+                _LOGGER.debug("C6: Ignoring push for unknown device %s", device_id)
+                continue
+            if device.update(state=delta.get("state"), connected=delta.get("connected")):
+                changed[device_id] = device.changed_since(self._seen.get(device_id, 0))
+                self._seen[device_id] = device.revision
+                self.views[device_id] = decode_state(device.state, device.connected)
+
+        if not changed:
+            return
+
+        _LOGGER.debug("C7: Applying pushed state for %d devices", len(changed))
+        self._changed = changed
+        self._set_push_healthy(True)
+        self.async_set_updated_data(self.data)
+        self._save_snapshot()
+
+    @callback
+    def async_set_push_available(self, connected: bool) -> None:
+        """Track the MQTT push channel and adjust polling to match."""
+        _LOGGER.debug("C8: MQTT push channel %s", "up" if connected else "down")
+        self._set_push_healthy(connected)
+
+    @callback
+    def async_note_command(self) -> None:
+        """Poll quickly for a short while to confirm a command's result.
+
+        Skipped while MQTT pushes are healthy, as the device's report then
+        arrives as a push.
+        """
+        if self._push_healthy:
+            return
+        self._burst_until = time.monotonic() + COMMAND_POLL_BURST
+        self._idle_polls = 0
+        self._apply_poll_interval(reschedule=True)
+
+    def _set_push_healthy(self, healthy: bool) -> None:
+        """Poll slowly as a safety net while pushes are flowing."""
+        if healthy == self._push_healthy:
+            return
+        self._push_healthy = healthy
+        self._idle_polls = 0
+        self._apply_poll_interval()
+        if not healthy and self.data is not None:
+            # Push just dropped: poll now instead of waiting out the slow interval
+            self.hass.async_create_task(self.async_request_refresh())
+
+    def _poll_seconds(self) -> float:
+        """Return the poll interval for the current conditions."""
+        if self.api.circuit_open:
+            # Back off exponentially while the cloud keeps failing
+            return min(
+                DEFAULT_POLL_SECONDS * 2 ** min(self._failed_polls, MAX_BACKOFF_STEPS),
+                FAILURE_POLL_MAX_SECONDS,
+            )
+        if time.monotonic() < self._burst_until:
+            return COMMAND_POLL_SECONDS
+        if self._push_healthy:
+            return PUSH_POLL_SECONDS
+        return min(
+            DEFAULT_POLL_SECONDS * IDLE_POLL_BACKOFF ** min(self._idle_polls, MAX_BACKOFF_STEPS),
+            IDLE_POLL_MAX_SECONDS,
+        )
+
+    def _apply_poll_interval(self, reschedule: bool = False) -> None:
+        """Update the poll interval, optionally moving the next poll to match."""
+        interval = timedelta(seconds=self._poll_seconds())
+        # Polled state stays usable for commands until the next poll
+        self.api.state_cache.poll_interval = interval.total_seconds()
+        if interval == self.update_interval:
+            return
+        _LOGGER.debug("C12: Poll interval now %ss", interval.total_seconds())
+        self.update_interval = interval
+        if reschedule and self._listeners:
+            self._schedule_refresh()
+
+    def _collect_changes(
+        self, data: Dict[str, DeviceRecord]
+    ) -> Dict[str, Optional[Set[str]]]:
+        """Return the changed keys per device since the last update.
+
+        None means the device is new or gone. Records carry the revision
+        each key last changed in, so only devices whose revision moved are
+        looked at key by key.
+        """
+        changed: Dict[str, Optional[Set[str]]] = {}
+        seen = self._seen
+        if len(seen) != len(data) or seen.keys() != data.keys():
+            for device_id in seen.keys() - data.keys():
+                changed[device_id] = None
+                del seen[device_id]
+
+        for device_id, device in data.items():
+            revision = seen.get(device_id)
+            if revision is None:
+                changed[device_id] = None
+            elif revision != device.revision:
+                changed[device_id] = device.changed_since(revision)
+            else:
+                continue
+            seen[device_id] = device.revision
+        return changed
+
+    def _update_views(self, data: Dict[str, DeviceRecord]) -> None:
+        """Decode state once per update, reusing views of unchanged devices."""
+        views = self.views
+        if len(views) != len(data) or views.keys() != data.keys():
+            for device_id in views.keys() - data.keys():
+                del views[device_id]
+        for device_id, device in data.items():
+            if device_id not in views or self._changed is None or device_id in self._changed:
+                views[device_id] = decode_state(device.state, device.connected)
+
+    def get_view(self, device_id: str) -> DeviceStateView:
+        """Return the decoded state view for a device."""
+        return self.views.get(device_id, EMPTY_VIEW)
+
+    def device_changed(self, device_id: str, keys: Iterable[str]) -> bool:
+        """Return True if any of keys changed for a device in the last update."""
+        if self._changed is None:
+            return True
+        if device_id not in self._changed:
+            return False
+        changed_keys = self._changed[device_id]
+        return changed_keys is None or not changed_keys.isdisjoint(keys)
+
+    def get_device(self, device_id: str) -> Optional[DeviceRecord]:
         """Get specific device data."""
-        return self.data.get(device_id, {})
+        return (self.data or {}).get(device_id)
 
-    def get_all_devices(self) -> Dict[str, Any]:
+    def get_all_devices(self) -> Dict[str, DeviceRecord]:
         """Get all devices data."""
         return self.data or {}
 
     def get_device_state(self, device_id: str) -> Dict[str, Any]:
         """Get device state."""
         device = self.get_device(device_id)
-        return device.get("state", {})
+        return device.state if device is not None else {}
 
     def is_device_connected(self, device_id: str) -> bool:
         """Check if device is connected."""
         device = self.get_device(device_id)
-        return device.get("connected", False)
\ No newline at end of file
+        return device.connected if device is not None else False
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""Bluestar Smart AC base entity."""
+
+import dataclasses
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .api import BluestarAPI
+from .const import OPTIMISTIC_TIMEOUT, OPTIMISTIC_TOLERANCE
+from .models import DeviceRecord, DeviceStateView
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _converged(reported: Any, expected: Any) -> bool:
+    """Return True if a reported view value matches an expected one."""
+    if isinstance(expected, float) and isinstance(reported, (int, float)):
+        # Temperatures round-trip through Fahrenheit on the device
+        return abs(reported - expected) <= OPTIMISTIC_TOLERANCE
+    return reported == expected
+
+
+class BluestarEntity(CoordinatorEntity):
+    """Coordinator entity that only writes state when its inputs changed.
+
+    Commands sent through _async_set_state are shown optimistically: once
+    the cloud accepts a command, the expected view values are applied on
+    top of the reported state until the device reports them, or rolled
+    back after OPTIMISTIC_TIMEOUT seconds if it never does.
+    """
+
+    # Device state keys (plus "connected"/"name") this entity's state reads
+    _state_keys: Tuple[str, ...] = ()
+
+    api: BluestarAPI
+    device_id: str
+    _last_available: Optional[bool] = None
+    _pending: Optional[Dict[str, Any]] = None
+    _cancel_rollback: Optional[Callable[[], None]] = None
+
+    def __init__(self, coordinator, api: BluestarAPI, device: DeviceRecord):
+        """Initialize the entity for one device."""
+        super().__init__(coordinator)
+        self.api = api
+        self.device_id = device.id
+        # Built once per device and shared by all of its entities
+        self._attr_device_info = device.device_info
+
+    @property
+    def view(self) -> DeviceStateView:
+        """Return the device's state view with pending values applied."""
+        view = self.coordinator.get_view(self.device_id)
+        if self._pending:
+            return dataclasses.replace(view, **self._pending)
+        return view
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if availability or a watched key changed."""
+        if self._pending:
+            self._reconcile()
+        available = self.available
+        if available == self._last_available and not self.coordinator.device_changed(
+            self.device_id, self._state_keys
+        ):
+            return
+        self._last_available = available
+        super()._handle_coordinator_update()
+
+    async def _async_set_state(
+        self, expected: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Send a command to this device and show its expected view values."""
+        result = await self.api.set_state(self.device_id, **kwargs)
+        self.coordinator.async_note_command()
+        if expected:
+            self._pending = {**(self._pending or {}), **expected}
+            self._reconcile()
+            if self._pending:
+                self._schedule_rollback()
+            self.async_write_ha_state()
+        return result
+
+    @callback
+    def _reconcile(self) -> None:
+        """Drop pending values the device now reports."""
+        reported = self.coordinator.get_view(self.device_id)
+        self._pending = {
+            key: value
+            for key, value in self._pending.items()
+            if not _converged(getattr(reported, key), value)
+        }
+        if not self._pending:
+            _LOGGER.debug("EN1: %s converged to the commanded state", self.entity_id)
+            self._clear_rollback()
+
+    def _schedule_rollback(self) -> None:
+        """(Re)start the convergence timeout."""
+        self._clear_rollback()
+        self._cancel_rollback = async_call_later(
+            self.hass, OPTIMISTIC_TIMEOUT, self._async_rollback
+        )
+
+    def _clear_rollback(self) -> None:
+        """Cancel the convergence timeout."""
+        if self._cancel_rollback:
+            self._cancel_rollback()
+            self._cancel_rollback = None
+
+    @callback
+    def _async_rollback(self, _now: Any) -> None:
+        """Fall back to the reported state when the device did not converge."""
+        self._cancel_rollback = None
+        if not self._pending:
+            return
+        reported = self.coordinator.get_view(self.device_id)
+        _LOGGER.warning(
+            "EN2: %s did not converge within %ss, expected %s but device reports %s",
+            self.entity_id,
+            OPTIMISTIC_TIMEOUT,
+            self._pending,
+            {key: getattr(reported, key) for key in self._pending},
+        )
+        self._pending = None
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel a pending rollback."""
+        self._clear_rollback()
+        await super().async_will_remove_from_hass()
+
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        """Flag state restored from the snapshot and not yet confirmed."""
+        if self.coordinator.stale:
+            return {"stale": True}
+        return None
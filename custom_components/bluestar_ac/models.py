@@ -0,0 +1,172 @@
+"""Bluestar Smart AC decoded device state."""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Set
+
+from homeassistant.components.climate import HVACMode
+from homeassistant.helpers.entity import DeviceInfo
+
+from .const import (
+    BLUESTAR_FAN_SPEEDS,
+    BLUESTAR_MODES,
+    BLUESTAR_SWING_MODES,
+    DEFAULT_TEMP,
+    DOMAIN,
+)
+
+# Bluestar mode name to HA HVAC mode
+HVAC_MODE_MAP = {
+    "fan": HVACMode.FAN_ONLY,
+    "cool": HVACMode.COOL,
+    "dry": HVACMode.DRY,
+    "auto": HVACMode.AUTO,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceStateView:
+    """Immutable, already-decoded view of one device's reported state."""
+
+    is_on: bool
+    hvac_mode: HVACMode
+    current_temperature: Optional[float]
+    target_temperature: float
+    fan_mode: str
+    swing_mode: str
+    hswing_mode: str
+    display_on: bool
+    rssi: int
+    error_code: int
+    connected: bool
+
+
+def _device_info(device_id: str, name: str) -> DeviceInfo:
+    """Build the device registry metadata shared by a device's entities."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, device_id)},
+        name=name,
+        manufacturer="Bluestar",
+        model="Smart AC",
+    )
+
+
+@dataclass(slots=True, eq=False)
+class DeviceRecord:
+    """One device as last reported by the cloud, updated in place.
+
+    The API keeps one record per device for the lifetime of the client and
+    applies every poll and push to it, so steady-state polling allocates
+    nothing per device. Each key remembers the revision it last changed
+    in, which lets consumers ask what changed since they last looked.
+    """
+
+    id: str
+    name: str
+    state: Dict[str, Any]
+    connected: bool
+    device_info: DeviceInfo
+    revision: int = 0
+    key_revisions: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def create(
+        cls, device_id: str, name: str, state: Dict[str, Any], connected: bool
+    ) -> "DeviceRecord":
+        """Create a record for a newly seen device."""
+        return cls(device_id, name, dict(state), connected, _device_info(device_id, name))
+
+    def update(
+        self,
+        name: Optional[str] = None,
+        state: Optional[Dict[str, Any]] = None,
+        connected: Optional[bool] = None,
+        replace: bool = False,
+    ) -> bool:
+        """Apply reported values; replace drops state keys not in state.
+
+        Returns True if anything changed.
+        """
+        revision = self.revision + 1
+        changed = self.key_revisions
+        dirty = False
+
+        if name is not None and name != self.name:
+            self.name = name
+            self.device_info = _device_info(self.id, name)
+            changed["name"] = revision
+            dirty = True
+        if connected is not None and connected != self.connected:
+            self.connected = connected
+            changed["connected"] = revision
+            dirty = True
+        if state is not None:
+            current = self.state
+            for key, value in state.items():
+                if key not in current or current[key] != value:
+                    current[key] = value
+                    changed[key] = revision
+                    dirty = True
+            if replace and len(current) != len(state):
+                for key in current.keys() - state.keys():
+                    del current[key]
+                    changed[key] = revision
+                    dirty = True
+
+        if dirty:
+            self.revision = revision
+        return dirty
+
+    def changed_since(self, revision: int) -> Set[str]:
+        """Return the keys that changed after the given revision."""
+        return {key for key, changed in self.key_revisions.items() if changed > revision}
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the record as plain data for storage."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "state": self.state,
+            "connected": self.connected,
+        }
+
+
+def _fahrenheit_to_celsius(value: Any) -> Optional[float]:
+    """Convert a reported Fahrenheit value to rounded Celsius."""
+    if not value:
+        return None
+    try:
+        return round((float(value) - 32) * 5 / 9, 1)
+    except (ValueError, TypeError):
+        return None
+
+
+def decode_state(state: Dict[str, Any], connected: bool) -> DeviceStateView:
+    """Decode a device's reported state into a DeviceStateView."""
+    power = state.get("pow", 0)
+
+    if power == 0:
+        hvac_mode = HVACMode.OFF
+    else:
+        mode_name = BLUESTAR_MODES.get(state.get("mode", 2), "cool")
+        hvac_mode = HVAC_MODE_MAP.get(mode_name, HVACMode.COOL)
+
+    target_temperature = _fahrenheit_to_celsius(state.get("stemp"))
+
+    return DeviceStateView(
+        is_on=power == 1,
+        hvac_mode=hvac_mode,
+        current_temperature=_fahrenheit_to_celsius(state.get("ctemp")),
+        target_temperature=(
+            DEFAULT_TEMP if target_temperature is None else target_temperature
+        ),
+        fan_mode=BLUESTAR_FAN_SPEEDS.get(state.get("fspd", 2), "low"),
+        swing_mode=BLUESTAR_SWING_MODES.get(state.get("vswing", 0), "off"),
+        hswing_mode=BLUESTAR_SWING_MODES.get(state.get("hswing", 0), "off"),
+        display_on=state.get("display", 1) != 0,
+        rssi=state.get("rssi", -45),
+        error_code=state.get("err", 0),
+        connected=connected,
+    )
+
+
+EMPTY_VIEW = decode_state({}, False)
@@ -0,0 +1,184 @@
+"""Bluestar Smart AC MQTT transport on the asyncio event loop."""
+
+import asyncio
+import logging
+import ssl
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import paho.mqtt.client as mqtt
+
+_LOGGER = logging.getLogger(__name__)
+
+# How often paho's housekeeping (keepalive pings, retries) runs
+MISC_LOOP_INTERVAL = 1
+
+
+class AsyncioMQTTLoop:
+    """Drive a paho client's network I/O from the event loop.
+
+    Instead of paho's background thread (loop_start), the client socket is
+    registered with the event loop: reads run when the socket is readable,
+    writes when paho has queued data and the socket is writable. All paho
+    callbacks therefore run on the event loop thread, and publish() is a
+    plain non-blocking call.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, client: mqtt.Client):
+        """Attach to a paho client."""
+        self.loop = loop
+        self.client = client
+        self._misc_task: Optional[asyncio.Task] = None
+        self._loop_thread = threading.get_ident()
+
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_close = self._on_socket_close
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    def _run(self, func: Callable, *args: Any) -> None:
+        """Run func on the event loop thread.
+
+        paho opens the socket (and queues CONNECT) inside connect(), which
+        runs in an executor, so callbacks from there are marshalled over.
+        """
+        if threading.get_ident() == self._loop_thread:
+            func(*args)
+        else:
+            self.loop.call_soon_threadsafe(func, *args)
+
+    def _on_socket_open(self, client, userdata, sock) -> None:
+        """Start watching a newly opened socket."""
+        self._run(self._watch, sock)
+
+    def _watch(self, sock) -> None:
+        """Register the socket reader and start the housekeeping task."""
+        _LOGGER.debug("MQ1: Watching MQTT socket")
+        self.loop.add_reader(sock, self._read)
+        if self._misc_task is None or self._misc_task.done():
+            self._misc_task = self.loop.create_task(self._misc_loop())
+
+    def _read(self) -> None:
+        """Read every packet the socket has ready.
+
+        loop_read() handles a single packet at QoS 0. Over TLS, further
+        packets decrypted from the same record wait in the SSL buffer,
+        where the selector cannot see them, so keep reading while it holds
+        data.
+        """
+        while self.client.loop_read() == mqtt.MQTT_ERR_SUCCESS:
+            sock = self.client.socket()
+            if not isinstance(sock, ssl.SSLSocket) or not sock.pending():
+                break
+
+    def _on_socket_close(self, client, userdata, sock) -> None:
+        """Stop watching a closed socket."""
+        _LOGGER.debug("MQ2: MQTT socket closed")
+        # The socket is closed right after this callback, so pass the fd
+        fd = sock.fileno()
+        self._run(self.loop.remove_reader, fd)
+        self._run(self.loop.remove_writer, fd)
+
+    def _on_socket_register_write(self, client, userdata, sock) -> None:
+        """Flush queued packets once the socket is writable."""
+        self._run(self.loop.add_writer, sock, self.client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock) -> None:
+        """Stop waiting for writability when the queue is empty."""
+        self._run(self.loop.remove_writer, sock)
+
+    async def _misc_loop(self) -> None:
+        """Run paho's periodic housekeeping while the connection is up."""
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            try:
+                await asyncio.sleep(MISC_LOOP_INTERVAL)
+            except asyncio.CancelledError:
+                break
+        _LOGGER.debug("MQ3: MQTT housekeeping stopped")
+
+    def stop(self) -> None:
+        """Stop the housekeeping task."""
+        if self._misc_task and not self._misc_task.done():
+            self._misc_task.cancel()
+        self._misc_task = None
+
+
+class PushBridge:
+    """Bounded, batching hand-off of pushed device deltas into the event loop.
+
+    post() may be called from any thread. Deltas for the same device that
+    are still pending are merged, and everything pending is delivered as one
+    batch on the next loop iteration, so a burst of shadow updates produces
+    a single coordinator update. When maxsize devices are already pending,
+    deltas for further devices are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        deliver: Callable[[Dict[str, Dict[str, Any]]], None],
+        maxsize: int,
+    ):
+        """Initialize the bridge."""
+        self.loop = loop
+        self.maxsize = maxsize
+        self._deliver = deliver
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._scheduled = False
+        self.received = 0
+        self.merged = 0
+        self.dropped = 0
+        self.batches = 0
+
+    @property
+    def depth(self) -> int:
+        """Return the number of devices with a pending delta."""
+        return len(self._pending)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Return queue depth and counters."""
+        return {
+            "depth": self.depth,
+            "received": self.received,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "batches": self.batches,
+        }
+
+    def post(self, device_id: str, delta: Dict[str, Any]) -> None:
+        """Queue a device delta for delivery on the event loop."""
+        with self._lock:
+            self.received += 1
+            pending = self._pending.get(device_id)
+            if pending is not None:
+                self.merged += 1
+                if "state" in delta:
+                    pending["state"] = {**pending.get("state", {}), **delta["state"]}
+                if "connected" in delta:
+                    pending["connected"] = delta["connected"]
+            elif len(self._pending) >= self.maxsize:
+                self.dropped += 1
+                _LOGGER.debug("MQ4: Push queue full (%d devices), dropping update for %s",
+                                self.maxsize, device_id)
+                return
+            else:
+                self._pending[device_id] = dict(delta)
+
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.loop.call_soon_threadsafe(self._flush)
+
+    def _flush(self) -> None:
+        """Deliver everything pending as one batch."""
+        with self._lock:
+            batch = self._pending
+            self._pending = {}
+            self._scheduled = False
+        if not batch:
+            return
+        self.batches += 1
+        _LOGGER.debug("MQ5: Delivering %d pushed device updates", len(batch))
+        self._deliver(batch)
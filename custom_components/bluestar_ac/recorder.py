@@ -0,0 +1,204 @@
+"""Bluestar Smart AC traffic recording."""
+
+import asyncio
+import logging
+import time
+from typing import IO, Any, Dict, Iterator, List, Optional, Set
+
+from . import codec
+from .const import RECORDER_FLUSH_SECONDS, RECORDING_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+# Values never written to a recording
+REDACTED = "**REDACTED**"
+REDACTED_KEYS = frozenset({
+    "auth_id",
+    "password",
+    "session",
+    "mi",
+    "access_key",
+    "secret_key",
+    "session_id",
+})
+
+# Event types
+EVENT_START = "start"
+EVENT_HTTP = "http"
+EVENT_MQTT_IN = "mqtt_in"
+EVENT_MQTT_OUT = "mqtt_out"
+
+
+def redact(value: Any) -> Any:
+    """Return value with every credential-bearing field replaced."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in REDACTED_KEYS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+def decode_body(body: bytes) -> Any:
+    """Return a JSON body decoded, or as text when it is not JSON."""
+    try:
+        return codec.loads(body)
+    except ValueError:
+        return body.decode(errors="replace")
+
+
+def read_recording(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the events of a recording, in order."""
+    with open(path, "rb") as recording:
+        for line in recording:
+            if line.strip():
+                yield codec.loads(line)
+
+
+class TrafficRecorder:
+    """Append HTTP exchanges and MQTT messages to a JSON Lines file.
+
+    Each line is one event with its offset "t" in seconds from the start
+    of the recording. Credentials are redacted before anything is
+    buffered. Events are written from the executor at most every
+    RECORDER_FLUSH_SECONDS, so recording never blocks the event loop.
+    """
+
+    def __init__(self, path: str):
+        """Initialize the recorder."""
+        self.path = path
+        self.events = 0
+        self._started = time.monotonic()
+        self._buffer: List[bytes] = []
+        self._file: Optional[IO[bytes]] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks
+        self._flushes: Set[asyncio.Task] = set()
+        self._write_lock = asyncio.Lock()
+
+    async def async_open(self) -> None:
+        """Open the file and write the start event."""
+        loop = asyncio.get_running_loop()
+        self._file = await loop.run_in_executor(None, open, self.path, "ab")
+        self._started = time.monotonic()
+        self._record({"type": EVENT_START, "version": RECORDING_VERSION, "wall": time.time()})
+        _LOGGER.info("RC1: Recording Bluestar traffic to %s", self.path)
+
+    async def async_close(self) -> None:
+        """Write what is buffered and close the file."""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._file is None:
+            return
+        await self._async_flush()
+        file, self._file = self._file, None
+        # Wait for a flush still writing before closing under it
+        async with self._write_lock:
+            await asyncio.get_running_loop().run_in_executor(None, file.close)
+        _LOGGER.info("RC2: Recorded %d events to %s", self.events, self.path)
+
+    def http(
+        self,
+        method: str,
+        path: str,
+        status: int,
+        duration: float,
+        request: Any = None,
+        response: Any = None,
+        entry: Optional[str] = None,
+    ) -> None:
+        """Record one HTTP exchange; path excludes the base URL."""
+        event = {
+            "type": EVENT_HTTP,
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration": round(duration, 4),
+        }
+        if request is not None:
+            event["request"] = request
+        if response is not None:
+            event["response"] = response
+        if entry is not None:
+            event["entry"] = entry
+        self._record(event)
+
+    def mqtt(
+        self, event_type: str, topic: str, payload: Any, entry: Optional[str] = None
+    ) -> None:
+        """Record one MQTT message, received (mqtt_in) or published (mqtt_out)."""
+        event = {"type": event_type, "topic": topic, "payload": payload}
+        if entry is not None:
+            event["entry"] = entry
+        self._record(event)
+
+    def for_entry(self, entry_id: str) -> "EntryRecorder":
+        """Return a view of this recorder that tags events with entry_id."""
+        return EntryRecorder(self, entry_id)
+
+    def _record(self, event: Dict[str, Any]) -> None:
+        """Buffer an event and make sure a flush is scheduled."""
+        if self._file is None:
+            return
+        event["t"] = round(time.monotonic() - self._started, 4)
+        self._buffer.append(codec.dumps(redact(event)) + b"\n")
+        self.events += 1
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                RECORDER_FLUSH_SECONDS, self._start_flush
+            )
+
+    def _start_flush(self) -> None:
+        """Start a flush task, keeping a reference to it."""
+        task = asyncio.get_running_loop().create_task(self._async_flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _async_flush(self) -> None:
+        """Write buffered events in the executor, in order."""
+        self._flush_handle = None
+        if not self._buffer or self._file is None:
+            return
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        file = self._file
+        async with self._write_lock:
+            await asyncio.get_running_loop().run_in_executor(None, _write, file, data)
+
+
+class EntryRecorder:
+    """One config entry's view of a shared TrafficRecorder.
+
+    Every event is tagged with the entry ID, so a recording taken with
+    several accounts loaded can be replayed one account at a time.
+    """
+
+    def __init__(self, recorder: TrafficRecorder, entry_id: str):
+        """Initialize the view."""
+        self.recorder = recorder
+        self.entry_id = entry_id
+
+    def http(
+        self,
+        method: str,
+        path: str,
+        status: int,
+        duration: float,
+        request: Any = None,
+        response: Any = None,
+    ) -> None:
+        """Record one HTTP exchange of this entry."""
+        self.recorder.http(method, path, status, duration, request, response, self.entry_id)
+
+    def mqtt(self, event_type: str, topic: str, payload: Any) -> None:
+        """Record one MQTT message of this entry."""
+        self.recorder.mqtt(event_type, topic, payload, self.entry_id)
+
+
+def _write(file: IO[bytes], data: bytes) -> None:
+    """Append data and push it to the OS."""
+    file.write(data)
+    file.flush()
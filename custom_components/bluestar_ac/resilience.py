@@ -0,0 +1,115 @@
+"""Bluestar Smart AC retries and circuit breaking for cloud calls."""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class BluestarServerError(Exception):
+    """Error to indicate the cloud answered with a 5xx status."""
+
+
+class BluestarCircuitOpenError(Exception):
+    """Error to indicate calls are short-circuited after repeated failures."""
+
+
+def is_transient(error: BaseException) -> bool:
+    """Return True for failures worth retrying: network, timeout or 5xx."""
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, BluestarServerError))
+
+
+class CircuitBreaker:
+    """Retry transient failures with jitter and stop calling a failing cloud.
+
+    Each call is retried up to retries times with full-jitter exponential
+    backoff. A call that still fails counts towards threshold consecutive
+    failures, after which the circuit opens and calls fail fast. Once
+    reset_timeout has passed, one trial call is let through; its success
+    closes the circuit, its failure opens it again. Non-transient errors
+    (auth, 4xx, throttling) pass through without being retried or counted.
+    """
+
+    def __init__(
+        self,
+        retries: int,
+        base_delay: float,
+        max_delay: float,
+        threshold: int,
+        reset_timeout: float,
+    ):
+        """Initialize the breaker."""
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def is_open(self) -> bool:
+        """Return True while calls are being short-circuited."""
+        return self.opened_at is not None
+
+    async def call(self, request: Callable[[], Awaitable[_T]]) -> _T:
+        """Run a request with retries, unless the circuit is open."""
+        trial = self._before_call()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    result = await request()
+                except Exception as e:
+                    if not is_transient(e):
+                        raise
+                    if attempt >= self.retries:
+                        self._record_failure(e)
+                        raise
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                    attempt += 1
+                    _LOGGER.debug("RE1: Transient failure (%s), retry %d in %.2fs",
+                                  e, attempt, delay)
+                    await asyncio.sleep(delay)
+                else:
+                    self._record_success()
+                    return result
+        finally:
+            if trial:
+                self._trial_running = False
+
+    def _before_call(self) -> bool:
+        """Fail fast while open; return True for the one trial call let through."""
+        if self.opened_at is None:
+            return False
+        if self._trial_running or time.monotonic() - self.opened_at < self.reset_timeout:
+            raise BluestarCircuitOpenError(
+                f"Bluestar cloud unavailable after {self.failures} consecutive failures"
+            )
+        _LOGGER.debug("RE2: Circuit half-open, trying one call")
+        self._trial_running = True
+        return True
+
+    def _record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        if self.opened_at is not None:
+            _LOGGER.info("RE3: Bluestar cloud reachable again, circuit closed")
+        self.failures = 0
+        self.opened_at = None
+
+    def _record_failure(self, error: Exception) -> None:
+        """Count a failed call and open the circuit at the threshold."""
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.threshold:
+            if self.opened_at is None:
+                _LOGGER.warning("RE4: %d consecutive cloud failures, pausing calls for %ss: %s",
+                                self.failures, self.reset_timeout, error)
+            self.opened_at = time.monotonic()
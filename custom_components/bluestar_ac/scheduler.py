@@ -0,0 +1,192 @@
+"""Bluestar Smart AC account-wide request scheduling."""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Priority classes, lower runs first
+PRIORITY_COMMAND = 0
+PRIORITY_CONFIRM = 1
+PRIORITY_POLL = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_COMMAND: "command",
+    PRIORITY_CONFIRM: "confirm",
+    PRIORITY_POLL: "poll",
+}
+
+
+class BluestarRateLimitError(Exception):
+    """Error to indicate the cloud throttled a request (429)."""
+
+    def __init__(self, message: str, retry_after: float):
+        """Initialize the error with the delay the cloud asked for."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str], default: float) -> float:
+    """Return the delay in seconds from a Retry-After header value."""
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+    # Missing or an HTTP date, which API Gateway does not send
+    return default
+
+
+class RequestScheduler:
+    """Token bucket shared by every request of one account.
+
+    Requests take a token before going out; when the bucket is empty they
+    queue and are released in priority order (commands, then command
+    confirmations, then background polls), FIFO within a class. A 429
+    pauses the whole bucket for the Retry-After delay and the throttled
+    request is queued again.
+    """
+
+    def __init__(self, rate: float, burst: int, max_retries: int):
+        """Initialize the scheduler."""
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.throttled = 0
+        self._waits: Dict[int, List[float]] = {
+            priority: [0, 0.0, 0.0] for priority in PRIORITY_NAMES
+        }
+
+    @property
+    def depth(self) -> int:
+        """Return the number of queued requests."""
+        return len(self._queue)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, throttle count and wait times per priority."""
+        return {
+            "depth": self.depth,
+            "tokens": round(self._tokens, 2),
+            "throttled": self.throttled,
+            "wait": {
+                PRIORITY_NAMES[priority]: {
+                    "count": count,
+                    "avg": round(total / count, 3) if count else 0.0,
+                    "max": round(longest, 3),
+                }
+                for priority, (count, total, longest) in self._waits.items()
+            },
+        }
+
+    async def run(self, priority: int, request: Callable[[], Awaitable[_T]]) -> _T:
+        """Run a request once a token is available, honouring 429s."""
+        attempt = 0
+        while True:
+            await self.acquire(priority)
+            try:
+                return await request()
+            except BluestarRateLimitError as e:
+                self.throttled += 1
+                self.pause(e.retry_after)
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                _LOGGER.warning("RS1: Throttled by the cloud, retrying in %.1fs", e.retry_after)
+
+    async def acquire(self, priority: int) -> None:
+        """Wait for a token, behind every queued request of higher priority."""
+        started = time.monotonic()
+        self._refill(started)
+        if not self._queue and self._tokens >= 1 and started >= self._paused_until:
+            self._tokens -= 1
+            self._record_wait(priority, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future))
+        self._schedule_dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled, hand the token back
+                self._tokens += 1
+                self._schedule_dispatch()
+            raise
+        waited = time.monotonic() - started
+        self._record_wait(priority, waited)
+        if waited > 1:
+            _LOGGER.debug("RS2: %s request waited %.2fs for a token",
+                          PRIORITY_NAMES.get(priority, priority), waited)
+
+    def pause(self, delay: float) -> None:
+        """Stop granting tokens for delay seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        # Start refilling from empty once the pause is over
+        self._tokens = 0.0
+        self._refilled = self._paused_until
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens accrued since the last refill."""
+        if now <= self._refilled:
+            return
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _record_wait(self, priority: int, waited: float) -> None:
+        """Update the wait statistics of a priority class."""
+        waits = self._waits.setdefault(priority, [0, 0.0, 0.0])
+        waits[0] += 1
+        waits[1] += waited
+        waits[2] = max(waits[2], waited)
+
+    def _schedule_dispatch(self, delay: float = 0) -> None:
+        """Run the dispatcher after delay, unless one is already due."""
+        if self._timer is not None:
+            return
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self) -> None:
+        """Grant available tokens to queued requests in priority order."""
+        self._timer = None
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._paused_until:
+            self._schedule_dispatch(self._paused_until - now)
+            return
+
+        while self._queue and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+
+        # Drop cancelled waiters at the head so they don't keep a timer alive
+        while self._queue and self._queue[0][2].done():
+            heapq.heappop(self._queue)
+        if self._queue:
+            self._schedule_dispatch((1 - self._tokens) / self.rate)
+
+    def cancel(self) -> None:
+        """Stop dispatching and fail queued requests."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        for _, _, future in self._queue:
+            if not future.done():
+                future.cancel()
+        self._queue.clear()
@@ -1,13 +1,12 @@
 """Bluestar Smart AC select platform."""
 
 import logging
-from typing import Any, Dict, List
 
 from homeassistant.components.select import SelectEntity
-from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import BLUESTAR_SWING_MODES, DOMAIN, HA_SWING_MODES
+from .const import DOMAIN, HA_SWING_MODES
+from .entity import BluestarEntity
+from .models import DeviceRecord
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,104 +22,74 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     _LOGGER.debug("SL2: Found %d devices for selects", len(devices))
     
     entities = []
-    for device_id, device_data in devices.items():
+    for device_id, device in devices.items():
         _LOGGER.debug("SL3: Creating select entities for device %s", device_id)
         
         # Vertical swing select
-        vswing_entity = BluestarVerticalSwingSelect(coordinator, api, device_id, device_data)
+        vswing_entity = BluestarVerticalSwingSelect(coordinator, api, device)
         entities.append(vswing_entity)
         
         # Horizontal swing select
-        hswing_entity = BluestarHorizontalSwingSelect(coordinator, api, device_id, device_data)
+        hswing_entity = BluestarHorizontalSwingSelect(coordinator, api, device)
         entities.append(hswing_entity)
     
     _LOGGER.debug("SL4: Adding %d select entities", len(entities))
     async_add_entities(entities)
 
 
-class BluestarVerticalSwingSelect(CoordinatorEntity, SelectEntity):
+class BluestarVerticalSwingSelect(BluestarEntity, SelectEntity):
     """Bluestar AC vertical swing select."""
 
-    def __init__(self, coordinator, api, device_id: str, device_data: Dict[str, Any]):
+    _state_keys = ("vswing",)
+    _attr_options = list(HA_SWING_MODES.keys())
+
+    def __init__(self, coordinator, api, device: DeviceRecord):
         """Initialize the vertical swing select."""
-        super().__init__(coordinator)
-        self.api = api
-        self.device_id = device_id
-        self.device_data = device_data
+        super().__init__(coordinator, api, device)
         
         # Set unique ID
-        self._attr_unique_id = f"bluestar_ac_{device_id}_vswing"
+        self._attr_unique_id = f"bluestar_ac_{device.id}_vswing"
         
         # Set name
-        device_name = device_data.get("name", "Bluestar AC")
+        device_name = device.name
         self._attr_name = f"{device_name} Vertical Swing"
-        
-        # Set device info
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, device_id)},
-            name=device_name,
-            manufacturer="Bluestar",
-            model="Smart AC",
-        )
-
-    @property
-    def options(self) -> List[str]:
-        """Return list of available options."""
-        return list(HA_SWING_MODES.keys())
 
     @property
     def current_option(self) -> str:
         """Return current option."""
-        state = self.coordinator.get_device_state(self.device_id)
-        vswing = state.get("vswing", 0)
-        return BLUESTAR_SWING_MODES.get(vswing, "off")
+        return self.view.swing_mode
 
     async def async_select_option(self, option: str) -> None:
         """Select an option."""
         _LOGGER.debug("SL5: Setting vertical swing to %s", option)
         swing_value = HA_SWING_MODES.get(option, 0)
-        await self.api.set_state(self.device_id, vswing=swing_value)
+        await self._async_set_state({"swing_mode": option}, vswing=swing_value)
 
 
-class BluestarHorizontalSwingSelect(CoordinatorEntity, SelectEntity):
+class BluestarHorizontalSwingSelect(BluestarEntity, SelectEntity):
     """Bluestar AC horizontal swing select."""
 
-    def __init__(self, coordinator, api, device_id: str, device_data: Dict[str, Any]):
+    _state_keys = ("hswing",)
+    _attr_options = list(HA_SWING_MODES.keys())
+
+    def __init__(self, coordinator, api, device: DeviceRecord):
         """Initialize the horizontal swing select."""
-        super().__init__(coordinator)
-        self.api = api
-        self.device_id = device_id
-        self.device_data = device_data
+        super().__init__(coordinator, api, device)
         
         # Set unique ID
-        self._attr_unique_id = f"bluestar_ac_{device_id}_hswing"
+        self._attr_unique_id = f"bluestar_ac_{device.id}_hswing"
         
         # Set name
-        device_name = device_data.get("name", "Bluestar AC")
+        device_name = device.name
         self._attr_name = f"{device_name} Horizontal Swing"
-        
-        # Set device info
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, device_id)},
-            name=device_name,
-            manufacturer="Bluestar",
-            model="Smart AC",
-        )
-
-    @property
-    def options(self) -> List[str]:
-        """Return list of available options."""
-        return list(HA_SWING_MODES.keys())
 
     @property
     def current_option(self) -> str:
         """Return current option."""
-        state = self.coordinator.get_device_state(self.device_id)
-        hswing = state.get("hswing", 0)
-        return BLUESTAR_SWING_MODES.get(hswing, "off")
+        return self.view.hswing_mode
 
     async def async_select_option(self, option: str) -> None:
         """Select an option."""
         _LOGGER.debug("SL6: Setting horizontal swing to %s", option)
         swing_value = HA_SWING_MODES.get(option, 0)
-        await self.api.set_state(self.device_id, hswing=swing_value)
+        await self._async_set_state({"hswing_mode": option}, hswing=swing_value)
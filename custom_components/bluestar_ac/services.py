@@ -0,0 +1,437 @@
+"""Bluestar Smart AC services."""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+import voluptuous as vol
+
+from homeassistant.components.climate import ATTR_HVAC_MODE, HVACMode
+from homeassistant.const import ATTR_DEVICE_ID, ATTR_NAME, ATTR_TEMPERATURE, CONF_FILENAME
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api import BluestarAPI
+from .const import (
+    BULK_MAX_CONCURRENCY,
+    DOMAIN,
+    HA_FAN_SPEEDS,
+    HA_MODES,
+    HA_SWING_MODES,
+    MAX_TEMP,
+    MIN_TEMP,
+    RESTORE_TEMPERATURE_TOLERANCE,
+    SNAPSHOT_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+from .coordinator import BluestarCoordinator
+from .models import DeviceStateView
+from .recorder import EntryRecorder, TrafficRecorder
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BULK_SET_STATE = "bulk_set_state"
+SERVICE_SNAPSHOT = "snapshot"
+SERVICE_RESTORE = "restore"
+SERVICE_START_RECORDING = "start_recording"
+SERVICE_STOP_RECORDING = "stop_recording"
+
+DATA_SNAPSHOTS = f"{DOMAIN}_snapshots"
+DATA_RECORDER = f"{DOMAIN}_recorder"
+DEFAULT_SNAPSHOT_NAME = "default"
+
+ATTR_FAN_MODE = "fan_mode"
+ATTR_SWING_MODE = "swing_mode"
+ATTR_HSWING_MODE = "hswing_mode"
+ATTR_DISPLAY = "display"
+ATTR_MAX_CONCURRENCY = "max_concurrency"
+
+STATE_FIELDS = (
+    ATTR_HVAC_MODE,
+    ATTR_TEMPERATURE,
+    ATTR_FAN_MODE,
+    ATTR_SWING_MODE,
+    ATTR_HSWING_MODE,
+    ATTR_DISPLAY,
+)
+
+BULK_SET_STATE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_HVAC_MODE): vol.In(list(HA_MODES)),
+            vol.Optional(ATTR_TEMPERATURE): vol.All(
+                vol.Coerce(float), vol.Range(min=MIN_TEMP, max=MAX_TEMP)
+            ),
+            vol.Optional(ATTR_FAN_MODE): vol.In(list(HA_FAN_SPEEDS)),
+            vol.Optional(ATTR_SWING_MODE): vol.In(list(HA_SWING_MODES)),
+            vol.Optional(ATTR_HSWING_MODE): vol.In(list(HA_SWING_MODES)),
+            vol.Optional(ATTR_DISPLAY): cv.boolean,
+            vol.Optional(ATTR_MAX_CONCURRENCY, default=BULK_MAX_CONCURRENCY): vol.All(
+                vol.Coerce(int), vol.Range(min=1)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(*STATE_FIELDS),
+)
+
+SNAPSHOT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_NAME, default=DEFAULT_SNAPSHOT_NAME): cv.string,
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+RESTORE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_NAME, default=DEFAULT_SNAPSHOT_NAME): cv.string,
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_MAX_CONCURRENCY, default=BULK_MAX_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+    }
+)
+
+START_RECORDING_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_FILENAME): cv.string,
+    }
+)
+
+
+@dataclass(slots=True)
+class SnapshotData:
+    """Saved snapshots by name, and the storage they persist to."""
+
+    store: Store
+    data: Dict[str, Dict[str, Any]]
+
+# (api, coordinator, Bluestar device IDs) per config entry
+Targets = Dict[str, Tuple[BluestarAPI, BluestarCoordinator, List[str]]]
+
+
+def _command_kwargs(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate service fields into BluestarAPI.set_state keyword arguments."""
+    kwargs: Dict[str, Any] = {}
+    if ATTR_HVAC_MODE in data:
+        kwargs["hvac_mode"] = data[ATTR_HVAC_MODE]
+    if ATTR_TEMPERATURE in data:
+        # The API takes Fahrenheit, like the climate entity sends it
+        kwargs["target_temperature"] = (data[ATTR_TEMPERATURE] * 9 / 5) + 32
+    if ATTR_FAN_MODE in data:
+        kwargs["fan_mode"] = data[ATTR_FAN_MODE]
+    if ATTR_SWING_MODE in data:
+        kwargs["swing_mode"] = data[ATTR_SWING_MODE]
+    if ATTR_HSWING_MODE in data:
+        kwargs["hswing"] = HA_SWING_MODES.get(data[ATTR_HSWING_MODE], 0)
+    if ATTR_DISPLAY in data:
+        kwargs["display"] = data[ATTR_DISPLAY]
+    return kwargs
+
+
+def _resolve_targets(hass: HomeAssistant, device_ids: Optional[List[str]]) -> Targets:
+    """Group the requested devices (all when none are given) by config entry."""
+    entries = hass.data.get(DOMAIN, {})
+    targets: Targets = {}
+
+    if not device_ids:
+        for entry_id, data in entries.items():
+            coordinator = data["coordinator"]
+            targets[entry_id] = (data["api"], coordinator, list(coordinator.get_all_devices()))
+        return targets
+
+    registry = dr.async_get(hass)
+    for device_id in device_ids:
+        device = registry.async_get(device_id)
+        bluestar_id = None
+        if device:
+            bluestar_id = next(
+                (ident for domain, ident in device.identifiers if domain == DOMAIN), None
+            )
+        if bluestar_id is None:
+            raise ServiceValidationError(f"{device_id} is not a Bluestar AC device")
+
+        for entry_id, data in entries.items():
+            coordinator = data["coordinator"]
+            if bluestar_id in coordinator.get_all_devices():
+                targets.setdefault(entry_id, (data["api"], coordinator, []))[2].append(bluestar_id)
+                break
+        else:
+            raise ServiceValidationError(f"Bluestar AC {bluestar_id} is not loaded")
+    return targets
+
+
+async def _async_send_one(
+    api: BluestarAPI,
+    device_id: str,
+    kwargs: Dict[str, Any],
+    semaphore: asyncio.Semaphore,
+) -> Dict[str, Any]:
+    """Send one device's command under the concurrency cap."""
+    async with semaphore:
+        started = time.monotonic()
+        try:
+            result = await api.set_state(device_id, **kwargs)
+        except Exception as e:  # pylint: disable=broad-except
+            _LOGGER.warning("SV2: Command for %s failed: %s", device_id, e)
+            return {
+                "success": False,
+                "error": str(e),
+                "elapsed": round(time.monotonic() - started, 3),
+            }
+        return {
+            "success": True,
+            "transport": result["transport"],
+            "latency": round(result["latency"], 3),
+            "elapsed": round(time.monotonic() - started, 3),
+        }
+
+
+async def _async_dispatch(
+    targets: Dict[str, Tuple[BluestarAPI, BluestarCoordinator, Dict[str, Dict[str, Any]]]],
+    max_concurrency: int,
+) -> Dict[str, Dict[str, Any]]:
+    """Send per-device commands for several entries concurrently."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _async_entry(
+        api: BluestarAPI,
+        coordinator: BluestarCoordinator,
+        commands: Dict[str, Dict[str, Any]],
+    ) -> Dict[str, Dict[str, Any]]:
+        # One shared /things fetch instead of one per device
+        try:
+            await api.prefetch_state(list(commands))
+        except Exception as e:  # pylint: disable=broad-except
+            _LOGGER.debug("SV3: Prefetching state failed, devices fetch on demand: %s", e)
+        results = await asyncio.gather(
+            *(
+                _async_send_one(api, device_id, kwargs, semaphore)
+                for device_id, kwargs in commands.items()
+            )
+        )
+        if commands:
+            coordinator.async_note_command()
+        return dict(zip(commands, results))
+
+    devices: Dict[str, Dict[str, Any]] = {}
+    for entry_results in await asyncio.gather(
+        *(_async_entry(*target) for target in targets.values())
+    ):
+        devices.update(entry_results)
+    return devices
+
+
+def _summary(started: float, devices: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a service response from per-device results."""
+    return {
+        "elapsed": round(time.monotonic() - started, 3),
+        "succeeded": sum(1 for result in devices.values() if result["success"]),
+        "failed": sum(1 for result in devices.values() if not result["success"]),
+        "devices": devices,
+    }
+
+
+async def async_bulk_set_state(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Set the same state on many devices concurrently."""
+    started = time.monotonic()
+    kwargs = _command_kwargs(call.data)
+    targets = {
+        entry_id: (api, coordinator, {device_id: kwargs for device_id in device_ids})
+        for entry_id, (api, coordinator, device_ids) in _resolve_targets(
+            hass, call.data.get(ATTR_DEVICE_ID)
+        ).items()
+    }
+    _LOGGER.debug("SV1: Bulk set %s on %d devices", kwargs,
+                  sum(len(commands) for _, _, commands in targets.values()))
+
+    devices = await _async_dispatch(targets, call.data[ATTR_MAX_CONCURRENCY])
+    return _summary(started, devices)
+
+
+def _view_fields(view: DeviceStateView) -> Dict[str, Any]:
+    """Return the restorable fields of a decoded state, as service fields."""
+    return {
+        ATTR_HVAC_MODE: HVACMode.OFF.value if not view.is_on else view.hvac_mode.value,
+        ATTR_TEMPERATURE: view.target_temperature,
+        ATTR_FAN_MODE: view.fan_mode,
+        ATTR_SWING_MODE: view.swing_mode,
+        ATTR_HSWING_MODE: view.hswing_mode,
+        ATTR_DISPLAY: view.display_on,
+    }
+
+
+def _differing_fields(saved: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the saved fields the device no longer matches."""
+    differing = {}
+    for key, value in saved.items():
+        if key == ATTR_TEMPERATURE:
+            if abs(current[key] - value) < RESTORE_TEMPERATURE_TOLERANCE:
+                continue
+        elif current.get(key) == value:
+            continue
+        differing[key] = value
+    return differing
+
+
+async def async_snapshot(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Save the current decoded state of devices under a name."""
+    snapshots = hass.data[DATA_SNAPSHOTS]
+    devices = {}
+    for _, coordinator, device_ids in _resolve_targets(
+        hass, call.data.get(ATTR_DEVICE_ID)
+    ).values():
+        for device_id in device_ids:
+            devices[device_id] = _view_fields(coordinator.get_view(device_id))
+
+    name = call.data[ATTR_NAME]
+    snapshots.data[name] = {"created": dt_util.utcnow().isoformat(), "devices": devices}
+    snapshots.store.async_delay_save(lambda: snapshots.data, SNAPSHOT_SAVE_DELAY)
+    _LOGGER.debug("SV4: Saved snapshot %s of %d devices", name, len(devices))
+    return {"name": name, **snapshots.data[name]}
+
+
+async def async_restore(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Send each device of a snapshot one merged command, only where it differs."""
+    started = time.monotonic()
+    name = call.data[ATTR_NAME]
+    snapshot = hass.data[DATA_SNAPSHOTS].data.get(name)
+    if snapshot is None:
+        raise ServiceValidationError(f"No Bluestar snapshot named {name}")
+
+    saved_devices = snapshot["devices"]
+    if call.data.get(ATTR_DEVICE_ID):
+        wanted = {
+            device_id
+            for _, _, device_ids in _resolve_targets(hass, call.data[ATTR_DEVICE_ID]).values()
+            for device_id in device_ids
+        }
+        saved_devices = {
+            device_id: fields
+            for device_id, fields in saved_devices.items()
+            if device_id in wanted
+        }
+
+    devices: Dict[str, Dict[str, Any]] = {}
+    targets: Dict[str, Tuple[BluestarAPI, BluestarCoordinator, Dict[str, Dict[str, Any]]]] = {}
+    for device_id, saved in saved_devices.items():
+        for entry_id, data in hass.data.get(DOMAIN, {}).items():
+            coordinator = data["coordinator"]
+            if device_id in coordinator.get_all_devices():
+                break
+        else:
+            devices[device_id] = {"success": False, "error": "Device is not loaded"}
+            continue
+
+        differing = _differing_fields(saved, _view_fields(coordinator.get_view(device_id)))
+        if not differing:
+            devices[device_id] = {"success": True, "skipped": True}
+            continue
+        targets.setdefault(entry_id, (data["api"], coordinator, {}))[2][device_id] = (
+            _command_kwargs(differing)
+        )
+
+    _LOGGER.debug("SV5: Restoring snapshot %s, %d of %d devices differ", name,
+                  sum(len(commands) for _, _, commands in targets.values()), len(saved_devices))
+    devices.update(await _async_dispatch(targets, call.data[ATTR_MAX_CONCURRENCY]))
+    return _summary(started, devices)
+
+
+def recorder_for_entry(hass: HomeAssistant, entry_id: str) -> Optional[EntryRecorder]:
+    """Return the running recording's view for a config entry, if recording."""
+    recorder: Optional[TrafficRecorder] = hass.data.get(DATA_RECORDER)
+    return recorder.for_entry(entry_id) if recorder else None
+
+
+def _attach_recorder(hass: HomeAssistant) -> None:
+    """Point every loaded API client at the running recording, or at none."""
+    for entry_id, data in hass.data.get(DOMAIN, {}).items():
+        data["api"].recorder = recorder_for_entry(hass, entry_id)
+
+
+def _recording_summary(recorder: TrafficRecorder) -> Dict[str, Any]:
+    """Return the service response describing a recording."""
+    return {"path": recorder.path, "events": recorder.events}
+
+
+async def async_start_recording(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Start recording all Bluestar cloud traffic to a file."""
+    if (recorder := hass.data.get(DATA_RECORDER)) is not None:
+        raise ServiceValidationError(f"Already recording to {recorder.path}")
+
+    filename = call.data.get(CONF_FILENAME) or (
+        f"{DOMAIN}_{dt_util.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    )
+    path = os.path.realpath(hass.config.path(filename))
+    if os.path.dirname(path) != os.path.realpath(hass.config.config_dir):
+        raise ServiceValidationError(f"{filename} must be a file in the config directory")
+
+    recorder = TrafficRecorder(path)
+    try:
+        await recorder.async_open()
+    except OSError as e:
+        raise ServiceValidationError(f"Cannot write to {path}: {e}") from e
+    hass.data[DATA_RECORDER] = recorder
+    _attach_recorder(hass)
+    _LOGGER.debug("SV6: Recording to %s", path)
+    return _recording_summary(recorder)
+
+
+async def async_stop_recording(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Stop the running recording and close its file."""
+    recorder = hass.data.pop(DATA_RECORDER, None)
+    if recorder is None:
+        raise ServiceValidationError("Not recording")
+
+    _attach_recorder(hass)
+    await recorder.async_close()
+    _LOGGER.debug("SV7: Stopped recording to %s after %d events", recorder.path, recorder.events)
+    return _recording_summary(recorder)
+
+
+async def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+    store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.snapshots")
+    hass.data[DATA_SNAPSHOTS] = SnapshotData(store, await store.async_load() or {})
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_SET_STATE,
+        partial(async_bulk_set_state, hass),
+        schema=BULK_SET_STATE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SNAPSHOT,
+        partial(async_snapshot, hass),
+        schema=SNAPSHOT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RESTORE,
+        partial(async_restore, hass),
+        schema=RESTORE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_RECORDING,
+        partial(async_start_recording, hass),
+        schema=START_RECORDING_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_RECORDING,
+        partial(async_stop_recording, hass),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
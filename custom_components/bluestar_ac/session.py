@@ -0,0 +1,103 @@
+"""Bluestar Smart AC session lifecycle management."""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional, Set, TypeVar
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class BluestarAuthError(Exception):
+    """Error to indicate the session token was rejected (401/403)."""
+
+
+class SessionManager:
+    """Keep a Bluestar session alive with single-flight (re-)login.
+
+    Concurrent callers that hit an expired token share one login, requests
+    that failed with an auth error are retried once with the new token, and
+    the token is refreshed in the background before its expected expiry.
+    """
+
+    def __init__(
+        self,
+        login: Callable[[], Awaitable[None]],
+        token_ttl: float,
+        refresh_margin: float,
+        retry_delay: float,
+    ):
+        """Initialize the session manager."""
+        self._login = login
+        self.token_ttl = token_ttl
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+        self.generation = 0
+        self.logged_in_at: Optional[float] = None
+        self._login_task: Optional[asyncio.Task] = None
+        self._refresh_handle: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks
+        self._refresh_tasks: Set[asyncio.Task] = set()
+
+    async def login(self) -> None:
+        """Log in, joining a login that is already in flight."""
+        if self._login_task is None or self._login_task.done():
+            self._login_task = asyncio.get_running_loop().create_task(self._run_login())
+        await asyncio.shield(self._login_task)
+
+    async def _run_login(self) -> None:
+        """Perform one login and schedule the proactive refresh."""
+        _LOGGER.debug("SM1: Logging in (generation %d)", self.generation + 1)
+        await self._login()
+        self.generation += 1
+        self.logged_in_at = time.monotonic()
+        self._schedule_refresh(max(self.token_ttl - self.refresh_margin, 0))
+
+    async def call(self, request: Callable[[], Awaitable[_T]]) -> _T:
+        """Run a request, re-logging in once if the session was rejected."""
+        generation = self.generation
+        try:
+            return await request()
+        except BluestarAuthError as e:
+            if generation == self.generation:
+                _LOGGER.info("SM2: Session rejected (%s), logging in again", e)
+                await self.login()
+            else:
+                _LOGGER.debug("SM3: Session already refreshed by another caller")
+            return await request()
+
+    def _schedule_refresh(self, delay: float) -> None:
+        """Schedule a background refresh of the session token."""
+        if self._refresh_handle:
+            self._refresh_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._refresh_handle = loop.call_later(delay, self._start_refresh)
+
+    def _start_refresh(self) -> None:
+        """Start the proactive refresh task, keeping a reference to it."""
+        task = asyncio.get_running_loop().create_task(self._proactive_refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _proactive_refresh(self) -> None:
+        """Refresh the token before it expires so no user call pays for it."""
+        self._refresh_handle = None
+        try:
+            await self.login()
+            _LOGGER.debug("SM4: Session refreshed proactively")
+        except Exception as e:  # pylint: disable=broad-except
+            _LOGGER.warning("SM5: Proactive session refresh failed, retrying in %ss: %s",
+                            self.retry_delay, e)
+            self._schedule_refresh(self.retry_delay)
+
+    def cancel(self) -> None:
+        """Stop background refreshes."""
+        if self._refresh_handle:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+        for task in self._refresh_tasks:
+            task.cancel()
+        if self._login_task and not self._login_task.done():
+            self._login_task.cancel()
@@ -0,0 +1,36 @@
+"""Shared test setup for the bluestar_ac integration."""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Import the integration as the bluestar_ac package, like Home Assistant does
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "custom_components"))
+
+
+class FakeClock:
+    """Monotonic clock advanced by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Return a function that fakes time.monotonic in the given modules.
+
+    Only those modules see the fake clock; the event loop keeps real time.
+    """
+    clock = FakeClock()
+
+    def install(*modules) -> FakeClock:
+        for module in modules:
+            monkeypatch.setattr(module, "time", SimpleNamespace(monotonic=clock))
+        return clock
+
+    return install
@@ -0,0 +1,218 @@
+"""Benchmarks of the API, coordinator and entity hot paths.
+
+The recorded /things and shadow fixtures in tests/fixtures are scaled to
+each device count and run through get_devices, _send_http_command,
+BluestarCoordinator._async_update_data and the climate entity's state
+properties. Nothing touches the network: HTTP is cut at
+_get_things/_post_preferences and the request scheduler is unthrottled.
+
+pytest.ini disables timing, so a plain test run executes every case once.
+To measure, compare with the saved baseline in benchmarks/results and
+fail on a slowdown:
+
+    python -m pytest tests/test_benchmarks.py --benchmark-enable \\
+        --benchmark-compare --benchmark-compare-fail=min:100%
+
+Timings are absolute, so the baseline only means something on the machine
+that recorded it, and shared machines vary by tens of percent between
+runs. Add --benchmark-autosave to record a new baseline when a change
+intentionally moves the numbers, and commit it.
+"""
+
+import asyncio
+import itertools
+import os
+from typing import Any, Dict, List
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from bluestar_ac import codec
+from bluestar_ac.api import BluestarAPI
+from bluestar_ac.climate import BluestarClimateEntity
+from bluestar_ac.coordinator import BluestarCoordinator
+from bluestar_ac.scheduler import RequestScheduler
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+DEVICE_COUNTS = (1, 10, 100, 1000)
+
+CLIMATE_PROPERTIES = (
+    "hvac_mode",
+    "current_temperature",
+    "target_temperature",
+    "fan_mode",
+    "swing_mode",
+    "is_on",
+    "available",
+    "extra_state_attributes",
+)
+
+devices = pytest.mark.parametrize("devices", DEVICE_COUNTS)
+
+
+def load_fixture(name: str) -> Any:
+    """Return a decoded fixture from tests/fixtures."""
+    with open(os.path.join(FIXTURES, name), "rb") as fixture:
+        return codec.loads(fixture.read())
+
+
+def scale_things(recorded: Dict[str, Any], devices: int, reported=None) -> bytes:
+    """Return a /things body with devices copies of the recorded devices.
+
+    Pass reported to give every device that reported state instead of the
+    recorded one.
+    """
+    templates = recorded["things"]
+    things = []
+    states = {}
+    for index in range(devices):
+        thing = templates[index % len(templates)]
+        device_id = f"{thing['thing_id'][:8]}{index:04x}"
+        things.append({
+            **thing,
+            "thing_id": device_id,
+            "user_config": {
+                **thing["user_config"],
+                "name": f"{thing['user_config']['name']} {index}",
+            },
+        })
+        state = recorded["states"][thing["thing_id"]]
+        if reported is not None:
+            state = {**state, "state": reported}
+        states[device_id] = state
+    return codec.dumps({"things": things, "states": states})
+
+
+@pytest.fixture(scope="module")
+def loop():
+    """Event loop shared by the module's benchmarks."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def hass(loop, tmp_path_factory):
+    """Home Assistant instance the coordinators run in."""
+
+    async def create() -> HomeAssistant:
+        return HomeAssistant(str(tmp_path_factory.mktemp("config")))
+
+    hass = loop.run_until_complete(create())
+    yield hass
+    loop.run_until_complete(hass.async_stop(force=True))
+
+
+@pytest.fixture(scope="module")
+def things():
+    """Recorded /things response."""
+    return load_fixture("things.json")
+
+
+@pytest.fixture(scope="module")
+def shadow():
+    """Recorded shadow update/accepted message."""
+    return load_fixture("shadow_update_accepted.json")
+
+
+@pytest.fixture
+def offline_api(loop):
+    """Factory for clients that answer /things from bodies, in turn; all closed after."""
+    clients: List[BluestarAPI] = []
+
+    def create(bodies: List[bytes]) -> BluestarAPI:
+        api = BluestarAPI("bench", "bench", coalesce_window=0, things_cache_ttl=0)
+        api.session_token = "bench"
+        # Measure the client, not the account's token bucket
+        api._scheduler = RequestScheduler(1e9, 10**9, 0)
+        responses = itertools.cycle(bodies)
+
+        async def get_things() -> Any:
+            return codec.loads(next(responses))
+
+        async def post_preferences(device_id, preferences_payload, headers) -> None:
+            codec.dumps(preferences_payload)
+
+        api._get_things = get_things
+        api._post_preferences = post_preferences
+        clients.append(api)
+        return api
+
+    yield create
+    for api in clients:
+        loop.run_until_complete(api.close())
+
+
+def coordinator_for(loop, hass, api: BluestarAPI) -> BluestarCoordinator:
+    """Return a coordinator over api after its first refresh."""
+
+    async def create() -> BluestarCoordinator:
+        coordinator = BluestarCoordinator(hass, api)
+        await coordinator.async_refresh()
+        return coordinator
+
+    return loop.run_until_complete(create())
+
+
+@devices
+def test_get_devices(benchmark, loop, offline_api, things, devices):
+    """/things decode and in-place record updates."""
+    api = offline_api([scale_things(things, devices)])
+    loop.run_until_complete(api.get_devices())
+
+    result = benchmark(lambda: loop.run_until_complete(api.get_devices()))
+    assert len(result) == devices
+
+
+@devices
+def test_send_http_command(benchmark, loop, offline_api, things, devices):
+    """Preferences payload building, one command per device."""
+    api = offline_api([scale_things(things, devices)])
+    loop.run_until_complete(api.get_devices())
+    device_ids = list(api.devices)
+    command = {"pow": 1, "stemp": "75", "fspd": 3}
+
+    async def send_commands() -> None:
+        for device_id in device_ids:
+            await api._send_http_command(device_id, command)
+
+    benchmark(lambda: loop.run_until_complete(send_commands()))
+
+
+@devices
+def test_coordinator_idle(benchmark, loop, hass, offline_api, things, devices):
+    """A coordinator update in which nothing changed."""
+    coordinator = coordinator_for(loop, hass, offline_api([scale_things(things, devices)]))
+
+    benchmark(lambda: loop.run_until_complete(coordinator._async_update_data()))
+    assert coordinator._changed == {}
+
+
+@devices
+def test_coordinator_changed(benchmark, loop, hass, offline_api, things, shadow, devices):
+    """Coordinator updates that alternate between the recorded and the shadow state."""
+    changed = scale_things(things, devices, shadow["state"]["reported"])
+    coordinator = coordinator_for(
+        loop, hass, offline_api([scale_things(things, devices), changed])
+    )
+
+    benchmark(lambda: loop.run_until_complete(coordinator._async_update_data()))
+    assert len(coordinator._changed) == devices
+
+
+@devices
+def test_climate_properties(benchmark, loop, hass, offline_api, things, devices):
+    """Every climate entity's state properties."""
+    coordinator = coordinator_for(loop, hass, offline_api([scale_things(things, devices)]))
+    entities = [
+        BluestarClimateEntity(coordinator, coordinator.api, device)
+        for device in coordinator.get_all_devices().values()
+    ]
+
+    def read_properties() -> None:
+        for entity in entities:
+            for name in CLIMATE_PROPERTIES:
+                getattr(entity, name)
+
+    benchmark(read_properties)
@@ -0,0 +1,77 @@
+"""Freshness of the per-device state cache used by the command path."""
+
+from typing import Dict
+
+import pytest
+
+from bluestar_ac import cache
+from bluestar_ac.cache import DeviceStateCache
+from bluestar_ac.models import DeviceRecord
+
+
+@pytest.fixture
+def clock(fake_clock):
+    """Fake clock of the cache module."""
+    return fake_clock(cache)
+
+
+def records(*device_ids: str) -> Dict[str, DeviceRecord]:
+    """Return device records in mode 2 (cool)."""
+    return {
+        device_id: DeviceRecord.create(device_id, "AC", {"mode": 2}, True)
+        for device_id in device_ids
+    }
+
+
+def test_polled_state_is_fresh_until_the_next_poll(clock):
+    """Slow polling stretches freshness beyond max_age, but not past a missed poll."""
+    state_cache = DeviceStateCache(90, records("ac1"))
+    state_cache.touch("ac1")
+
+    clock.now += 100
+    assert state_cache.get_mode("ac1") is None
+
+    state_cache.poll_interval = 120
+    assert state_cache.get_mode("ac1") == 2
+
+    clock.now += 30
+    assert state_cache.get_mode("ac1") is None
+
+
+def test_pushed_state_does_not_age_while_connected(clock):
+    """Records updated since MQTT came up stay fresh until it drops."""
+    state_cache = DeviceStateCache(90, records("ac1", "ac2"))
+    state_cache.touch("ac1")
+    state_cache.touch("ac2")
+
+    clock.now += 100
+    state_cache.set_live(True)
+    clock.now += 1
+    # Ahead of the record until the coordinator applies the push
+    state_cache.update_state("ac1", {"mode": {"value": 3}})
+
+    clock.now += 3600
+    assert state_cache.get_mode("ac1") == 3
+    # Older than the connection, so a change may have been missed
+    assert state_cache.get_mode("ac2") is None
+
+    state_cache.set_live(False)
+    assert state_cache.get_mode("ac1") is None
+
+
+def test_mode_is_read_from_the_record(clock):
+    """Only timestamps are cached; a poll makes the record's mode current again."""
+    devices = records("ac1")
+    state_cache = DeviceStateCache(90, devices)
+    state_cache.touch("ac1")
+    assert state_cache.get_mode("ac1") == 2
+
+    state_cache.set_mode("ac1", 4)
+    assert state_cache.get_mode("ac1") == 4
+
+    devices["ac1"].update(state={"mode": 1})
+    state_cache.touch("ac1")
+    assert state_cache.get_mode("ac1") == 1
+
+    state_cache.discard("ac1")
+    assert state_cache.get_mode("ac1") is None
@@ -0,0 +1,114 @@
+"""Merging of commands sent to one device within a short window."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from bluestar_ac.coalescer import CommandCoalescer
+
+WINDOW = 0.02
+
+
+class FakeSender:
+    """Send callback that records each command and answers with its number."""
+
+    def __init__(self, error: Optional[Exception] = None):
+        self.error = error
+        self.sent: List[Tuple[str, Dict[str, Any]]] = []
+
+    async def send(self, device_id: str, fields: Dict[str, Any]) -> Any:
+        self.sent.append((device_id, fields))
+        number = len(self.sent)
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return {"command": number}
+
+
+def test_calls_within_the_window_are_merged_last_write_wins():
+    """One command per device, later fields overriding earlier ones."""
+    sender = FakeSender()
+
+    async def run() -> list:
+        coalescer = CommandCoalescer(WINDOW, sender.send)
+        return await asyncio.gather(
+            coalescer.submit("ac1", {"pow": 1, "stemp": "72"}),
+            coalescer.submit("ac1", {"stemp": "74"}),
+            coalescer.submit("ac2", {"fspd": 3}),
+            coalescer.submit("ac1", {"fspd": 4}),
+        )
+
+    results = asyncio.run(run())
+    assert sender.sent == [
+        ("ac1", {"pow": 1, "stemp": "74", "fspd": 4}),
+        ("ac2", {"fspd": 3}),
+    ]
+    # Every caller gets the result of the one command it contributed to
+    assert results == [{"command": 1}, {"command": 1}, {"command": 2}, {"command": 1}]
+    assert results[0] is results[1] is results[3]
+
+
+def test_call_after_the_window_starts_a_new_command():
+    """A closed window is not reopened by later calls."""
+    sender = FakeSender()
+
+    async def run() -> None:
+        coalescer = CommandCoalescer(WINDOW, sender.send)
+        await coalescer.submit("ac1", {"pow": 1})
+        await coalescer.submit("ac1", {"stemp": "74"})
+
+    asyncio.run(run())
+    assert sender.sent == [("ac1", {"pow": 1}), ("ac1", {"stemp": "74"})]
+
+
+def test_failure_reaches_every_waiter():
+    """The merged command's exception is raised to each contributing caller."""
+    sender = FakeSender(Exception("Shadow update rejected"))
+
+    async def run() -> list:
+        coalescer = CommandCoalescer(WINDOW, sender.send)
+        return await asyncio.gather(
+            coalescer.submit("ac1", {"pow": 1}),
+            coalescer.submit("ac1", {"stemp": "74"}),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert len(sender.sent) == 1
+    assert [str(result) for result in results] == ["Shadow update rejected"] * 2
+
+
+def test_zero_window_passes_calls_straight_through():
+    """With window 0 every call is sent on its own, right away."""
+    sender = FakeSender()
+    fields = {"pow": 1}
+
+    async def run() -> list:
+        coalescer = CommandCoalescer(0, sender.send)
+        return await asyncio.gather(
+            coalescer.submit("ac1", fields),
+            coalescer.submit("ac1", {"stemp": "74"}),
+        )
+
+    assert asyncio.run(run()) == [{"command": 1}, {"command": 2}]
+    assert sender.sent == [("ac1", {"pow": 1}), ("ac1", {"stemp": "74"})]
+    # The caller's dict is not handed to the sender
+    assert sender.sent[0][1] is not fields
+
+
+def test_cancel_fails_pending_callers():
+    """Cancelling drops open windows without sending them."""
+    sender = FakeSender()
+
+    async def run() -> None:
+        coalescer = CommandCoalescer(WINDOW, sender.send)
+        pending = asyncio.ensure_future(coalescer.submit("ac1", {"pow": 1}))
+        await asyncio.sleep(0)
+        coalescer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        await asyncio.sleep(WINDOW * 2)
+
+    asyncio.run(run())
+    assert sender.sent == []
@@ -0,0 +1,55 @@
+"""Commands built by the API client for each transport."""
+
+import asyncio
+from typing import Any
+
+from bluestar_ac.api import BluestarAPI
+from bluestar_ac.scheduler import RequestScheduler
+
+DEVICE_ID = "24587ca00001"
+THINGS = {
+    "things": [{"thing_id": DEVICE_ID, "user_config": {"name": "AC"}}],
+    "states": {DEVICE_ID: {"state": {"pow": 1, "mode": 2, "stemp": "75"}, "connected": True}},
+}
+
+
+def offline_api() -> BluestarAPI:
+    """Return a client that records what it would send instead of sending it."""
+    api = BluestarAPI("phone", "password", coalesce_window=0)
+    api.session_token = "token"
+    api._scheduler = RequestScheduler(1e9, 10**9, 0)
+    api.sent = []
+
+    async def get_things() -> Any:
+        return THINGS
+
+    async def post_preferences(device_id, preferences_payload, headers) -> None:
+        api.sent.append(preferences_payload["preferences"]["mode"]["2"])
+
+    async def publish(device_id, payload) -> None:
+        api.sent.append(payload)
+
+    api._get_things = get_things
+    api._post_preferences = post_preferences
+    api._publish_mqtt_command_acked = publish
+    return api
+
+
+def test_target_temperature_is_a_string_on_both_transports():
+    """MQTT and HTTP send the same stemp string for the same command."""
+
+    async def send(mqtt_connected: bool) -> Any:
+        api = offline_api()
+        try:
+            await api.get_devices()
+            # Stands in for a connected client; publishing is cut above
+            api._mqtt_connected = mqtt_connected
+            api.mqtt_client = object() if mqtt_connected else None
+            await api.set_state(DEVICE_ID, target_temperature=75.2)
+        finally:
+            api._mqtt_connected = False
+            api.mqtt_client = None
+            await api.close()
+        return api.sent[-1]["stemp"]
+
+    assert asyncio.run(send(True)) == asyncio.run(send(False)) == "75.2"
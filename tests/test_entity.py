@@ -0,0 +1,148 @@
+"""Optimistic state of entities while a command is being confirmed."""
+
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from homeassistant.components.climate import HVACMode
+from homeassistant.core import HomeAssistant
+
+from bluestar_ac import entity
+from bluestar_ac.api import BluestarAPI
+from bluestar_ac.climate import BluestarClimateEntity
+from bluestar_ac.coordinator import BluestarCoordinator
+from bluestar_ac.scheduler import RequestScheduler
+
+DEVICE_ID = "24587ca00001"
+REPORTED = {"pow": 0, "mode": 3, "stemp": "75", "ctemp": "81.5", "fspd": 2, "vswing": 0}
+ROLLBACK = 0.05
+
+
+@pytest.fixture(autouse=True)
+def short_rollback(monkeypatch):
+    """Roll back unconfirmed commands after ROLLBACK seconds."""
+    monkeypatch.setattr(entity, "OPTIMISTIC_TIMEOUT", ROLLBACK)
+
+
+class Harness:
+    """Climate entity on a real coordinator, with commands and reports faked."""
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self.api = BluestarAPI("phone", "password", coalesce_window=0)
+        self.api.session_token = "token"
+        self.api._scheduler = RequestScheduler(1e9, 10**9, 0)
+        self.commands: List[Dict[str, Any]] = []
+        self.writes = 0
+
+        async def get_things() -> Any:
+            return {
+                "things": [{"thing_id": DEVICE_ID, "user_config": {"name": "AC"}}],
+                "states": {DEVICE_ID: {"state": dict(REPORTED), "connected": True}},
+            }
+
+        async def set_state(device_id: str, **kwargs: Any) -> Dict[str, Any]:
+            self.commands.append(kwargs)
+            return {"transport": "mqtt", "latency": 0.0}
+
+        self.api._get_things = get_things
+        self.api.set_state = set_state
+        self.coordinator = BluestarCoordinator(hass, self.api)
+
+    async def async_setup(self) -> BluestarClimateEntity:
+        """Refresh the coordinator and attach the climate entity."""
+        await self.coordinator.async_refresh()
+        device = self.coordinator.data[DEVICE_ID]
+        climate = BluestarClimateEntity(self.coordinator, self.api, device)
+        climate.hass = self.hass
+        climate.entity_id = "climate.ac"
+
+        def write_state() -> None:
+            self.writes += 1
+
+        climate.async_write_ha_state = write_state
+        self.coordinator.async_add_listener(climate._handle_coordinator_update)
+        return climate
+
+    def report(self, **state: Any) -> None:
+        """Deliver a pushed state report from the device."""
+        self.coordinator.async_handle_push({DEVICE_ID: {"state": state}})
+
+    async def async_close(self) -> None:
+        """Stop Home Assistant and close the client."""
+        await self.api.close()
+        await self.hass.async_stop(force=True)
+
+
+def run(tmp_path, test) -> None:
+    """Run test(harness, climate) in a fresh Home Assistant instance."""
+
+    async def main() -> None:
+        harness = Harness(HomeAssistant(str(tmp_path)))
+        try:
+            await test(harness, await harness.async_setup())
+        finally:
+            await harness.async_close()
+
+    asyncio.run(main())
+
+
+def test_commanded_values_show_until_the_device_reports_them(tmp_path):
+    """Pending values merge across commands and drop out once reported."""
+
+    async def test(harness: Harness, climate: BluestarClimateEntity) -> None:
+        await climate.async_set_temperature(temperature=25)
+        await climate.async_set_fan_mode("high")
+        assert harness.commands == [{"target_temperature": 77.0}, {"fan_mode": "high"}]
+        assert climate._pending == {"target_temperature": 25.0, "fan_mode": "high"}
+        assert (climate.target_temperature, climate.fan_mode) == (25.0, "high")
+
+        # 76.9 F reads back as 24.9 C, within the Fahrenheit round-trip tolerance
+        harness.report(stemp="76.9", fspd=4)
+        assert climate._pending == {}
+        assert climate._cancel_rollback is None
+        assert (climate.target_temperature, climate.fan_mode) == (24.9, "high")
+
+        await asyncio.sleep(ROLLBACK * 2)
+        assert climate.target_temperature == 24.9
+
+    run(tmp_path, test)
+
+
+def test_partly_reported_command_keeps_the_rest_pending(tmp_path):
+    """Only the values the device reports are dropped; the others stay shown."""
+
+    async def test(harness: Harness, climate: BluestarClimateEntity) -> None:
+        await climate.async_set_temperature(temperature=25)
+        await climate.async_set_hvac_mode(HVACMode.COOL)
+        assert climate._pending == {
+            "target_temperature": 25.0, "is_on": True, "hvac_mode": HVACMode.COOL,
+        }
+
+        # Powered on, but still in dry mode, and 25.6 C is outside the tolerance
+        harness.report(pow=1, stemp="78")
+        assert climate._pending == {"target_temperature": 25.0, "hvac_mode": HVACMode.COOL}
+        assert (climate.hvac_mode, climate.target_temperature) == (HVACMode.COOL, 25.0)
+        assert climate._cancel_rollback is not None
+
+        harness.report(stemp="77")
+        assert climate._pending == {"hvac_mode": HVACMode.COOL}
+
+    run(tmp_path, test)
+
+
+def test_unconfirmed_command_is_rolled_back(tmp_path):
+    """After the timeout the entity shows what the device reports again."""
+
+    async def test(harness: Harness, climate: BluestarClimateEntity) -> None:
+        await climate.async_set_hvac_mode(HVACMode.COOL)
+        assert climate.hvac_mode == HVACMode.COOL
+        writes = harness.writes
+
+        await asyncio.sleep(ROLLBACK * 2)
+        assert climate._pending is None
+        assert climate.hvac_mode == HVACMode.OFF
+        assert harness.writes == writes + 1
+
+    run(tmp_path, test)
@@ -0,0 +1,158 @@
+"""Memory the API client keeps per device across polls."""
+
+import asyncio
+import gc
+import itertools
+import tracemalloc
+from typing import Any, Dict, List
+
+import pytest
+
+from bluestar_ac.api import BluestarAPI
+from bluestar_ac.scheduler import RequestScheduler
+
+SCALES = (100, 200, 400)
+POLLS = 20
+
+
+def things_document(devices: int, stemp: str = "75") -> Dict[str, Any]:
+    """Return a /things response for an account with the given device count."""
+    things = []
+    states = {}
+    for index in range(devices):
+        device_id = f"24587ca0{index:04x}"
+        things.append({
+            "thing_id": device_id,
+            "user_config": {"name": f"AC {index}", "room": "Office"},
+            "model": "IC318DBTU",
+        })
+        states[device_id] = {
+            "state": {
+                "pow": 1, "mode": 2, "stemp": stemp, "ctemp": "81.5", "fspd": 3,
+                "vswing": -1, "hswing": 0, "display": 1, "rssi": -52, "err": 0,
+            },
+            "connected": True,
+        }
+    return {"things": things, "states": states}
+
+
+def retained(func) -> int:
+    """Return the bytes still allocated after running func."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+@pytest.fixture
+def loop():
+    """Event loop the polls run in."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def offline_api(loop):
+    """Factory for clients that poll the given /things documents, in turn; all closed after."""
+    clients: List[BluestarAPI] = []
+
+    def create(documents: List[Dict[str, Any]]) -> BluestarAPI:
+        api = BluestarAPI("phone", "password", things_cache_ttl=0)
+        api.session_token = "token"
+        api._scheduler = RequestScheduler(1e9, 10**9, 0)
+        responses = itertools.cycle(documents)
+
+        async def get_things() -> Any:
+            return next(responses)
+
+        api._get_things = get_things
+        clients.append(api)
+        return api
+
+    yield create
+    for api in clients:
+        loop.run_until_complete(api.close())
+
+
+def poll(loop, api: BluestarAPI, times: int = 1) -> None:
+    """Run get_devices, the coordinator's per-poll path."""
+    for _ in range(times):
+        loop.run_until_complete(api.get_devices())
+
+
+def plain_devices(document: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Return a /things document as the plain data of a stored snapshot."""
+    return {
+        thing["thing_id"]: {
+            "name": thing["user_config"]["name"],
+            **document["states"][thing["thing_id"]],
+        }
+        for thing in document["things"]
+    }
+
+
+def test_memory_per_device_is_flat(loop, offline_api):
+    """A poll costs the same per device at every account size."""
+    per_device = {}
+    for devices in SCALES:
+        api = offline_api([things_document(devices)])
+        per_device[devices] = retained(lambda: poll(loop, api)) / devices
+
+    smallest, largest = min(per_device.values()), max(per_device.values())
+    assert largest <= smallest * 1.2, per_device
+
+
+def test_poll_keeps_no_state_beside_the_records(loop, offline_api):
+    """The client holds little more than the records themselves, no state copies."""
+    devices = SCALES[-1]
+    document = things_document(devices)
+    api = offline_api([document])
+    polled = retained(lambda: poll(loop, api))
+
+    records_only = BluestarAPI("phone", "password")
+    restored = plain_devices(document)
+    records = retained(lambda: records_only.restore_devices(restored))
+
+    assert polled <= records * 1.15, (polled / devices, records / devices)
+
+
+def test_repeated_polls_do_not_grow(loop, offline_api):
+    """Polls with unchanged state allocate nothing that is kept."""
+    devices = SCALES[-1]
+    documents = [things_document(devices) for _ in range(POLLS)]
+    api = offline_api(documents)
+    poll(loop, api, POLLS)
+
+    # Allows the event loop's own bookkeeping, far less than a byte per device per poll
+    assert retained(lambda: poll(loop, api, POLLS)) < 2048
+
+
+def test_changed_polls_update_records_in_place(loop, offline_api):
+    """Changed values land in the existing records and shared metadata."""
+    api = offline_api([things_document(10), things_document(10, stemp="77")])
+    first = {record.id: record for record in loop.run_until_complete(api.get_devices())}
+    device_info = {device_id: record.device_info for device_id, record in first.items()}
+
+    records = loop.run_until_complete(api.get_devices())
+
+    for record in records:
+        assert record is first[record.id]
+        assert record.device_info is device_info[record.id]
+        assert record.state["stemp"] == "77"
+        assert record.changed_since(0) == {"stemp"}
+
+
+def test_removed_devices_are_dropped(loop, offline_api):
+    """Devices missing from a poll lose their records and cache entries."""
+    api = offline_api([things_document(10), things_document(4)])
+    poll(loop, api, 2)
+    assert len(api.devices) == 4
+    assert len(api.state_cache._updated) == 4
@@ -0,0 +1,97 @@
+"""MQTT network I/O driven from the event loop."""
+
+import asyncio
+import datetime
+import ssl
+
+import paho.mqtt.client as mqtt
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from bluestar_ac.mqtt import AsyncioMQTTLoop
+
+MESSAGES = 20
+TOPIC = "things/ac1/shadow/update/accepted"
+
+
+def self_signed(tmp_path):
+    """Write a localhost certificate and key; return their paths."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = tmp_path / "cert.pem"
+    key_path = tmp_path / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ))
+    return str(cert_path), str(key_path)
+
+
+def publish_packet(index: int) -> bytes:
+    """Return a QoS 0 PUBLISH packet on TOPIC."""
+    body = len(TOPIC).to_bytes(2, "big") + TOPIC.encode() + b'{"n":%d}' % index
+    return bytes([0x30, len(body)]) + body
+
+
+def test_reads_every_packet_of_a_tls_record(tmp_path):
+    """Packets sharing one TLS record are all delivered without new socket data."""
+    cert_path, key_path = self_signed(tmp_path)
+    server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_context.load_cert_chain(cert_path, key_path)
+    client_context = ssl.create_default_context(cafile=cert_path)
+
+    async def run() -> list:
+        loop = asyncio.get_running_loop()
+        received = []
+        all_received = asyncio.Event()
+
+        async def serve(reader, writer) -> None:
+            await reader.read(1024)  # CONNECT
+            # CONNACK and every PUBLISH in one write, so one TLS record
+            writer.write(b"\x20\x02\x00\x00" + b"".join(publish_packet(i) for i in range(MESSAGES)))
+            await writer.drain()
+            await reader.read(1024)
+
+        server = await asyncio.start_server(serve, "127.0.0.1", 0, ssl=server_context)
+        port = server.sockets[0].getsockname()[1]
+
+        def on_message(client, userdata, msg) -> None:
+            received.append(msg.payload)
+            if len(received) == MESSAGES:
+                all_received.set()
+
+        client = mqtt.Client(client_id="test", protocol=mqtt.MQTTv311)
+        client.tls_set_context(client_context)
+        client.on_message = on_message
+        mqtt_loop = AsyncioMQTTLoop(loop, client)
+        try:
+            await loop.run_in_executor(None, client.connect, "localhost", port, 60)
+            # Well inside the keepalive, which would otherwise wake the reader
+            await asyncio.wait_for(all_received.wait(), 2)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            mqtt_loop.stop()
+            client.disconnect()
+            server.close()
+            await server.wait_closed()
+        return received
+
+    received = asyncio.run(run())
+    assert received == [b'{"n":%d}' % index for index in range(MESSAGES)]
@@ -0,0 +1,76 @@
+"""Batching of pushed device deltas into the event loop."""
+
+import asyncio
+import threading
+from typing import Any, Dict, List
+
+from bluestar_ac.mqtt import PushBridge
+
+
+def bridge(maxsize: int = 10):
+    """Return a bridge on a new loop and the list of batches it delivers."""
+    loop = asyncio.new_event_loop()
+    batches: List[Dict[str, Dict[str, Any]]] = []
+    return loop, PushBridge(loop, batches.append, maxsize), batches
+
+
+def run_once(loop: asyncio.AbstractEventLoop) -> None:
+    """Run the callbacks the bridge scheduled, then close the loop."""
+    loop.run_until_complete(asyncio.sleep(0))
+    loop.close()
+
+
+def test_burst_is_merged_per_device_into_one_batch():
+    """A burst for a few devices arrives as one batch, last value winning per key."""
+    loop, push, batches = bridge()
+    push.post("ac1", {"state": {"pow": 1, "stemp": "72"}})
+    push.post("ac2", {"state": {"fspd": 3}})
+    push.post("ac1", {"state": {"stemp": "74"}})
+    push.post("ac3", {"connected": False})
+    push.post("ac1", {"connected": True})
+    push.post("ac3", {"state": {"pow": 0}, "connected": True})
+    assert push.depth == 3
+    assert batches == []
+
+    run_once(loop)
+    assert batches == [{
+        "ac1": {"state": {"pow": 1, "stemp": "74"}, "connected": True},
+        "ac2": {"state": {"fspd": 3}},
+        "ac3": {"state": {"pow": 0}, "connected": True},
+    }]
+    assert push.stats == {"depth": 0, "received": 6, "merged": 3, "dropped": 0, "batches": 1}
+
+
+def test_new_devices_are_dropped_when_full():
+    """Past maxsize pending devices, deltas for others are dropped and counted."""
+    loop, push, batches = bridge(maxsize=2)
+    push.post("ac1", {"state": {"pow": 1}})
+    push.post("ac2", {"state": {"pow": 1}})
+    push.post("ac3", {"state": {"pow": 1}})
+    # Already pending, so still merged
+    push.post("ac1", {"state": {"fspd": 4}})
+
+    run_once(loop)
+    assert batches == [{"ac1": {"state": {"pow": 1, "fspd": 4}}, "ac2": {"state": {"pow": 1}}}]
+    assert push.stats == {"depth": 0, "received": 4, "merged": 1, "dropped": 1, "batches": 1}
+
+
+def test_posts_from_another_thread_are_delivered_on_the_loop():
+    """The MQTT thread can post; delivery happens on the loop's thread."""
+    loop, push, batches = bridge()
+    delivered_on: List[threading.Thread] = []
+
+    def deliver(batch: Dict[str, Dict[str, Any]]) -> None:
+        delivered_on.append(threading.current_thread())
+        batches.append(batch)
+
+    push._deliver = deliver
+    poster = threading.Thread(
+        target=lambda: [push.post(f"ac{index}", {"state": {"pow": 1}}) for index in range(3)]
+    )
+    poster.start()
+    poster.join()
+
+    run_once(loop)
+    assert delivered_on == [threading.main_thread()]
+    assert [sorted(batch) for batch in batches] == [["ac0", "ac1", "ac2"]]
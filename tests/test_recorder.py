@@ -0,0 +1,50 @@
+"""Traffic recordings written by the API client."""
+
+import asyncio
+
+from bluestar_ac.recorder import (
+    EVENT_HTTP,
+    EVENT_MQTT_IN,
+    EVENT_START,
+    REDACTED,
+    TrafficRecorder,
+    read_recording,
+)
+
+
+def test_redacts_credentials_and_round_trips(tmp_path):
+    """Events read back in order, with no credential left in the file."""
+    path = str(tmp_path / "traffic.jsonl")
+
+    async def record() -> None:
+        recorder = TrafficRecorder(path)
+        await recorder.async_open()
+        recorder.http(
+            "POST",
+            "/auth/login",
+            200,
+            0.05,
+            request={"auth_id": "9999999999", "password": "hunter2", "auth_type": 1},
+            response={"session": "token", "mi": "bXF0dA==", "user": {"name": "Test"}},
+        )
+        recorder.for_entry("entry1").mqtt(
+            EVENT_MQTT_IN, "things/ac1/shadow/update", {"state": {"reported": {"pow": 1}}}
+        )
+        await recorder.async_close()
+        # Closed recorders drop further events
+        recorder.mqtt(EVENT_MQTT_IN, "things/ac1/shadow/update", {})
+
+    asyncio.run(record())
+
+    text = open(path, encoding="utf-8").read()
+    for secret in ("9999999999", "hunter2", "token", "bXF0dA=="):
+        assert secret not in text
+
+    events = list(read_recording(path))
+    assert [event["type"] for event in events] == [EVENT_START, EVENT_HTTP, EVENT_MQTT_IN]
+    assert events[1]["request"] == {"auth_id": REDACTED, "password": REDACTED, "auth_type": 1}
+    assert events[1]["response"]["user"] == {"name": "Test"}
+    assert events[2]["payload"] == {"state": {"reported": {"pow": 1}}}
+    assert events[2]["entry"] == "entry1"
+    assert "entry" not in events[1]
+    assert [event["t"] for event in events] == sorted(event["t"] for event in events)
@@ -0,0 +1,185 @@
+"""Retries and circuit breaking of cloud calls."""
+
+import asyncio
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+
+from bluestar_ac import resilience
+from bluestar_ac.resilience import (
+    BluestarCircuitOpenError,
+    BluestarServerError,
+    CircuitBreaker,
+    is_transient,
+)
+
+
+@pytest.fixture
+def clock(fake_clock):
+    """Fake clock of the resilience module."""
+    return fake_clock(resilience)
+
+
+@pytest.fixture
+def jitter(monkeypatch):
+    """Record the backoff bounds drawn from and retry without sleeping."""
+    bounds = []
+
+    def uniform(low: float, high: float) -> float:
+        bounds.append((low, high))
+        return 0.0
+
+    monkeypatch.setattr(resilience, "random", SimpleNamespace(uniform=uniform))
+    return bounds
+
+
+class FakeCloud:
+    """Request that fails with the queued errors, then succeeds."""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def request(self) -> str:
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def breaker(threshold: int = 3, retries: int = 0) -> CircuitBreaker:
+    return CircuitBreaker(retries, 1.0, 5.0, threshold, 60)
+
+
+def test_transient_errors():
+    """Network errors, timeouts and 5xx are retried; everything else is not."""
+    assert is_transient(aiohttp.ClientConnectionError())
+    assert is_transient(asyncio.TimeoutError())
+    assert is_transient(BluestarServerError("502"))
+    assert not is_transient(Exception("400"))
+
+
+def test_transient_failure_is_retried_with_capped_jitter(clock, jitter):
+    """Each retry draws from zero to the doubled delay, capped at max_delay."""
+    cloud = FakeCloud(*(BluestarServerError("503") for _ in range(4)))
+    circuit = breaker(retries=4)
+
+    assert asyncio.run(circuit.call(cloud.request)) == "ok"
+    assert cloud.calls == 5
+    assert jitter == [(0, 1.0), (0, 2.0), (0, 4.0), (0, 5.0)]
+    assert circuit.failures == 0
+
+
+def test_call_fails_after_retries_and_counts_once(clock, jitter):
+    """A call still failing after its retries raises and is one failure."""
+    cloud = FakeCloud(*(asyncio.TimeoutError() for _ in range(3)))
+    circuit = breaker(retries=2)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(circuit.call(cloud.request))
+    assert cloud.calls == 3
+    assert circuit.failures == 1
+    assert not circuit.is_open
+
+
+def test_non_transient_error_is_neither_retried_nor_counted(clock, jitter):
+    """Auth and 4xx errors pass straight through."""
+    cloud = FakeCloud(Exception("401"))
+    circuit = breaker(retries=3)
+
+    with pytest.raises(Exception, match="401"):
+        asyncio.run(circuit.call(cloud.request))
+    assert cloud.calls == 1
+    assert jitter == []
+    assert circuit.failures == 0
+
+
+def test_circuit_opens_at_threshold_and_fails_fast(clock, jitter):
+    """After threshold failed calls, further calls never reach the cloud."""
+    cloud = FakeCloud(*(BluestarServerError("500") for _ in range(3)))
+    circuit = breaker(threshold=3)
+
+    async def run() -> None:
+        for _ in range(3):
+            with pytest.raises(BluestarServerError):
+                await circuit.call(cloud.request)
+        assert circuit.is_open
+
+        clock.now += 59
+        with pytest.raises(BluestarCircuitOpenError):
+            await circuit.call(cloud.request)
+
+    asyncio.run(run())
+    assert cloud.calls == 3
+
+
+def test_successful_call_resets_the_failure_count(clock, jitter):
+    """Failures must be consecutive to open the circuit."""
+    cloud = FakeCloud(BluestarServerError("500"), BluestarServerError("500"))
+    circuit = breaker(threshold=3)
+
+    async def run() -> None:
+        for _ in range(2):
+            with pytest.raises(BluestarServerError):
+                await circuit.call(cloud.request)
+        assert await circuit.call(cloud.request) == "ok"
+
+    asyncio.run(run())
+    assert circuit.failures == 0
+    assert not circuit.is_open
+
+
+def test_half_open_lets_one_trial_through(clock, jitter):
+    """After reset_timeout one call tries the cloud; concurrent calls still fail fast."""
+    cloud = FakeCloud(BluestarServerError("500"))
+    circuit = breaker(threshold=1)
+
+    async def run() -> None:
+        with pytest.raises(BluestarServerError):
+            await circuit.call(cloud.request)
+        clock.now += 60
+
+        released = asyncio.Event()
+
+        async def slow_trial() -> str:
+            await released.wait()
+            return await cloud.request()
+
+        trial = asyncio.ensure_future(circuit.call(slow_trial))
+        await asyncio.sleep(0)
+        with pytest.raises(BluestarCircuitOpenError):
+            await circuit.call(cloud.request)
+
+        released.set()
+        assert await trial == "ok"
+        assert not circuit.is_open
+        assert circuit.failures == 0
+        assert await circuit.call(cloud.request) == "ok"
+
+    asyncio.run(run())
+    assert cloud.calls == 3
+
+
+def test_failed_trial_opens_the_circuit_again(clock, jitter):
+    """A failing trial restarts reset_timeout from the time it failed."""
+    cloud = FakeCloud(BluestarServerError("500"), aiohttp.ClientConnectionError())
+    circuit = breaker(threshold=1)
+
+    async def run() -> None:
+        with pytest.raises(BluestarServerError):
+            await circuit.call(cloud.request)
+        clock.now += 60
+        with pytest.raises(aiohttp.ClientConnectionError):
+            await circuit.call(cloud.request)
+        assert circuit.is_open
+
+        clock.now += 30
+        with pytest.raises(BluestarCircuitOpenError):
+            await circuit.call(cloud.request)
+        clock.now += 30
+        assert await circuit.call(cloud.request) == "ok"
+
+    asyncio.run(run())
+    assert cloud.calls == 3
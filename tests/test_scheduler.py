@@ -0,0 +1,139 @@
+"""Token bucket, priority ordering and 429 handling of the request scheduler."""
+
+import asyncio
+
+import pytest
+
+from bluestar_ac import scheduler
+from bluestar_ac.scheduler import (
+    PRIORITY_COMMAND,
+    PRIORITY_CONFIRM,
+    PRIORITY_POLL,
+    BluestarRateLimitError,
+    RequestScheduler,
+)
+
+# Tokens per second, a power of two so fake clock steps add up exactly;
+# dispatch timers are about a millisecond of real time
+RATE = 1024
+
+
+@pytest.fixture
+def clock(fake_clock):
+    """Fake clock of the scheduler module; it drives token refill and pauses."""
+    return fake_clock(scheduler)
+
+
+async def settle() -> None:
+    """Give pending dispatch timers time to fire."""
+    await asyncio.sleep(0.02)
+
+
+def test_burst_is_granted_immediately_then_requests_queue(clock):
+    """The first burst requests go straight out; the next one waits for a refill."""
+
+    async def run() -> None:
+        requests = RequestScheduler(RATE, 3, 0)
+        for _ in range(3):
+            await requests.acquire(PRIORITY_POLL)
+        assert requests.depth == 0
+
+        waiting = asyncio.ensure_future(requests.acquire(PRIORITY_POLL))
+        await settle()
+        assert not waiting.done()
+        assert requests.depth == 1
+
+        clock.now += 1 / RATE
+        await settle()
+        assert waiting.done()
+        assert requests.stats["wait"]["poll"]["count"] == 4
+
+    asyncio.run(run())
+
+
+def test_queued_requests_run_in_priority_order(clock):
+    """Commands go before confirmations before polls, FIFO within a class."""
+
+    async def run() -> list:
+        requests = RequestScheduler(RATE, 3, 0)
+        for _ in range(3):
+            await requests.acquire(PRIORITY_POLL)
+
+        order = []
+
+        async def request(name: str, priority: int) -> None:
+            await requests.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.ensure_future(request(name, priority))
+            for name, priority in (
+                ("poll 1", PRIORITY_POLL),
+                ("confirm", PRIORITY_CONFIRM),
+                ("poll 2", PRIORITY_POLL),
+                ("command", PRIORITY_COMMAND),
+            )
+        ]
+        await settle()
+        assert order == []
+
+        # Three tokens for four queued requests
+        clock.now += 3 / RATE
+        await settle()
+        assert order == ["command", "confirm", "poll 1"]
+
+        clock.now += 1 / RATE
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["command", "confirm", "poll 1", "poll 2"]
+
+
+def test_429_pauses_every_request_for_retry_after(clock):
+    """A throttled request is queued again, and nothing goes out until the pause ends."""
+
+    async def run() -> None:
+        requests = RequestScheduler(RATE, 5, 1)
+        calls = 0
+
+        async def throttled_once() -> str:
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise BluestarRateLimitError("429", retry_after=0.05)
+            return "ok"
+
+        retried = asyncio.ensure_future(requests.run(PRIORITY_POLL, throttled_once))
+        await settle()
+        assert calls == 1
+        assert requests.throttled == 1
+
+        # Even a command waits out the pause, with tokens left before the 429
+        command = asyncio.ensure_future(requests.acquire(PRIORITY_COMMAND))
+        await settle()
+        assert not command.done()
+        assert not retried.done()
+
+        # Two tokens after the pause, and a spare for the rounding of 0.05
+        clock.now += 0.05 + 3 / RATE
+        await asyncio.sleep(0.06)
+        await asyncio.wait_for(command, 1)
+        assert await asyncio.wait_for(retried, 1) == "ok"
+        assert calls == 2
+
+    asyncio.run(run())
+
+
+def test_429_raises_after_max_retries(clock):
+    """A request throttled more than max_retries times gives up with the 429."""
+
+    async def run() -> None:
+        requests = RequestScheduler(RATE, 5, 0)
+
+        async def throttled() -> None:
+            raise BluestarRateLimitError("429", retry_after=0.05)
+
+        await requests.run(PRIORITY_POLL, throttled)
+
+    with pytest.raises(BluestarRateLimitError):
+        asyncio.run(run())
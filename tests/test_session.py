@@ -0,0 +1,146 @@
+"""Single-flight re-login and proactive refresh of the Bluestar session."""
+
+import asyncio
+
+import pytest
+
+from bluestar_ac.session import BluestarAuthError, SessionManager
+
+
+class FakeCloud:
+    """Login endpoint and one authenticated request, with a rotating token."""
+
+    def __init__(self, login_delay: float = 0.01):
+        self.login_delay = login_delay
+        self.logins = 0
+        self.fail_logins = 0
+        self.token = "expired"
+        self.requests = 0
+
+    async def login(self) -> None:
+        self.logins += 1
+        await asyncio.sleep(self.login_delay)
+        if self.fail_logins:
+            self.fail_logins -= 1
+            raise Exception("login failed")
+        self.token = f"token{self.logins}"
+
+    async def request(self) -> str:
+        self.requests += 1
+        await asyncio.sleep(0)
+        if self.token == "expired":
+            raise BluestarAuthError("401")
+        return self.token
+
+
+def manager(
+    cloud: FakeCloud, token_ttl: float = 3600, margin: float = 0, retry_delay: float = 60
+) -> SessionManager:
+    return SessionManager(cloud.login, token_ttl, refresh_margin=margin, retry_delay=retry_delay)
+
+
+def test_concurrent_rejections_share_one_login():
+    """Many callers hitting an expired token cause exactly one login, then all succeed."""
+    cloud = FakeCloud()
+
+    async def run() -> list:
+        session = manager(cloud)
+        try:
+            return await asyncio.gather(*(session.call(cloud.request) for _ in range(20)))
+        finally:
+            session.cancel()
+
+    assert asyncio.run(run()) == ["token1"] * 20
+    assert cloud.logins == 1
+    # Every request ran twice: rejected once, retried once
+    assert cloud.requests == 40
+
+
+def test_request_is_retried_only_once():
+    """A request still rejected after the re-login raises instead of looping."""
+    cloud = FakeCloud()
+
+    async def always_rejected() -> None:
+        cloud.requests += 1
+        raise BluestarAuthError("403")
+
+    async def run() -> None:
+        session = manager(cloud)
+        try:
+            await session.call(always_rejected)
+        finally:
+            session.cancel()
+
+    with pytest.raises(BluestarAuthError):
+        asyncio.run(run())
+    assert cloud.logins == 1
+    assert cloud.requests == 2
+
+
+def test_caller_with_an_old_token_does_not_log_in_again():
+    """A rejection from before another caller's re-login retries without a new login."""
+    cloud = FakeCloud()
+
+    async def run() -> str:
+        session = manager(cloud)
+        try:
+            first_sent = asyncio.Event()
+
+            async def slow_request() -> str:
+                # Sent with the expired token, rejected after the re-login finished
+                token = cloud.token
+                first_sent.set()
+                await asyncio.sleep(0.05)
+                if token == "expired":
+                    raise BluestarAuthError("401")
+                return cloud.token
+
+            slow = asyncio.ensure_future(session.call(slow_request))
+            await first_sent.wait()
+            assert await session.call(cloud.request) == "token1"
+            return await slow
+        finally:
+            session.cancel()
+
+    assert asyncio.run(run()) == "token1"
+    assert cloud.logins == 1
+
+
+def test_token_is_refreshed_before_expiry():
+    """The token is renewed in the background refresh_margin before it expires."""
+    cloud = FakeCloud(login_delay=0)
+
+    async def run() -> None:
+        session = manager(cloud, token_ttl=10, margin=9.95)
+        try:
+            await session.login()
+            assert session.generation == 1
+            await asyncio.sleep(0.12)
+            # Well before the 10 s lifetime, without any caller asking
+            assert cloud.logins >= 2
+            assert session.generation == cloud.logins
+        finally:
+            session.cancel()
+
+    asyncio.run(run())
+
+
+def test_failed_refresh_is_retried():
+    """A proactive refresh that fails is tried again after retry_delay."""
+    cloud = FakeCloud(login_delay=0)
+
+    async def run() -> None:
+        session = manager(cloud, token_ttl=0.05, retry_delay=0.05)
+        try:
+            await session.login()
+            cloud.fail_logins = 1
+            await asyncio.sleep(0.075)
+            # The first refresh failed, the session is still on its first token
+            assert cloud.logins == 2
+            assert session.generation == 1
+            await asyncio.sleep(0.05)
+            assert session.generation >= 2
+        finally:
+            session.cancel()
+
+    asyncio.run(run())